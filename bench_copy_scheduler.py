@@ -0,0 +1,50 @@
+"""
+Compare copy throughput of the plan's own order against the disk-locality schedule.
+
+    python bench_copy_scheduler.py <file history target> <scratch output dir> [--no-data-dir]
+
+Point it at a target on the spinning drive you want to measure. Each order gets
+its own output directory. The second run can be served from the OS page cache,
+so for a fair number run each order once on a cold cache (for example
+`--order plan`, then reboot or remount the drive, then `--order scheduled`).
+"""
+import argparse
+import os
+import shutil
+import time
+
+from file_history_cleaner.main import main
+from file_history_cleaner.lib.copy_and_rename_files import copy_and_rename_files
+
+
+def run(folder_info, output_dir, schedule):
+    shutil.rmtree(output_dir, ignore_errors=True)
+    start = time.perf_counter()
+    files_copied, copied_size, _, _ = copy_and_rename_files(
+        folder_info, output_dir, dry_run=False, schedule=schedule
+    )
+    elapsed = time.perf_counter() - start
+    return files_copied, copied_size, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory")
+    parser.add_argument("output_dir")
+    parser.add_argument("--no-data-dir", action="store_true")
+    parser.add_argument("--order", choices=["plan", "scheduled", "both"], default="both")
+    args = parser.parse_args()
+
+    folder_info = main(args.directory, save_json=False, has_data_directory=not args.no_data_dir)
+
+    orders = ["plan", "scheduled"] if args.order == "both" else [args.order]
+    results = {}
+    for order in orders:
+        output_dir = os.path.join(args.output_dir, order)
+        results[order] = run(folder_info, output_dir, order == "scheduled")
+
+    for order, (files_copied, copied_size, elapsed) in results.items():
+        print(
+            f"{order:>9}: {files_copied} files, {copied_size / (1024 ** 2):.1f} MB in {elapsed:.2f}s "
+            f"({copied_size / (1024 ** 2) / max(elapsed, 1e-9):.1f} MB/s)"
+        )
@@ -0,0 +1,782 @@
+from collections import defaultdict
+import os
+import json
+import shutil
+from file_history_cleaner.lib.fast_csv import iter_columns, read_header
+from file_history_cleaner.lib.sinks import RecordSink
+from file_history_cleaner.lib.path_filter import PathFilter
+import sys
+from datetime import datetime
+import logging
+
+# Handlers are attached by setup_logging() at run time, not on import
+logger = logging.getLogger('catalog')
+
+# Configure logging
+def setup_logging(log_file='catalog.log'):
+    """Configure logging to output to both console and file"""
+    if logger.handlers:
+        return logger
+    logger.setLevel(logging.DEBUG)
+    
+    # Create formatters
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    # Create file handler - use 'w' mode to clear the file on each run
+    file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(formatter)
+    
+    # Create console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)  # Only show warnings and errors on console
+    console_handler.setFormatter(formatter)
+    
+    # Add handlers to logger
+    logger.addHandler(file_handler)
+    logger.addHandler(console_handler)
+    
+    return logger
+
+def load_string_map(string_csv_path, workers=1):
+    return dict(iter_columns(string_csv_path, ("id", "string"), workers))
+
+
+def load_file_map(file_csv_path, columns=("id", "childId", "parentId"), workers=1):
+    # Only the columns used for path lookups are kept per row
+    file_map = {}
+    try:
+        for values in iter_columns(file_csv_path, columns, workers):
+            row = dict(zip(columns, values))
+            file_map[row["id"]] = row
+            file_map[row["childId"]] = row
+    except FileNotFoundError:
+        logger.warning(f"file.csv not found at {file_csv_path}")
+    return file_map
+
+
+def list_folders_with_files_and_strings(
+    directory_path, string_csv_path, file_csv_path, output_file="folders.json", string_map=None
+):
+    if string_map is None:
+        string_map = load_string_map(string_csv_path)
+    folder_info = {}
+    
+    # Get list of directories to process; scandir's entry types avoid a stat per entry
+    with os.scandir(directory_path) as entries:
+        directories = [entry.name for entry in entries if entry.is_dir()]
+    
+    from tqdm import tqdm
+
+    # Create progress bar for folder checking
+    pbar = tqdm(total=len(directories), desc="Checking folders", unit="folder")
+
+    for name in directories:
+        folder_path = os.path.join(directory_path, name)
+        #logger.info(f"Checking: {name}")
+        try:
+            with os.scandir(folder_path) as entries:
+                files = [entry.name for entry in entries if entry.is_file()]
+        except OSError as e:
+            logger.warning(f"Could not list folder {folder_path}: {e}")
+            files = None
+        if files is not None:
+            file_entries = []
+
+            # Use the folder id (name) to look up the path string directly
+            folder_id = name
+            path_string = string_map.get(folder_id)
+
+            for f in files:
+                # Extract file id (assume it's the first part of the filename, before the first space or parenthesis)
+                file_id = f.split(" ", 1)[0].split("(", 1)[0].strip()
+                string_value = string_map.get(file_id, None)
+                file_entries.append(
+                    {
+                        "name": f,
+                        "id": file_id,
+                        "string": string_value,
+                        "path": path_string,
+                    }
+                )
+            folder_info[name] = {"files": file_entries, "count": len(files)}
+            
+            # Update progress bar
+            pbar.update(1)
+
+    # Close progress bar
+    pbar.close()
+
+    # Sort by numeric folder names
+    sorted_folder_info = dict(sorted(folder_info.items(), key=lambda x: int(x[0])))
+
+    #with open(output_file, "w", encoding="utf-8") as f:
+    #    json.dump(sorted_folder_info, f, indent=2)
+
+    #logger.info(f"Saved info for {len(sorted_folder_info)} folders to {output_file}")
+    logger.info(f"Found {len(sorted_folder_info)} folders with files.")
+    return sorted_folder_info
+
+
+def parse_csv(filepath, columns=None, workers=1):
+    if columns is None:
+        columns, _ = read_header(filepath)
+    data = [dict(zip(columns, values)) for values in iter_columns(filepath, columns, workers)]
+
+    # Build indexes
+    id_index = {clean_id(row["id"]): row for row in data}
+    parent_index = defaultdict(list)
+    for row in data:
+        parent_index[row["parentId"]].append(row)
+
+    return id_index, parent_index
+
+
+def load_namespace_map(namespace_csv_path, workers=1):
+    """Load namespace data to help find missing path information"""
+    namespace_map = {}
+    id_to_child_map = {}
+    columns = ("id", "childId", "parentId")
+    try:
+        for values in iter_columns(namespace_csv_path, columns, workers):
+            row = dict(zip(columns, values))
+            # Store by childId since that's what we need to look up
+            namespace_map[row["childId"]] = row
+            # Also create a mapping from id to childId
+            id_to_child_map[row["id"]] = row["childId"]
+    except FileNotFoundError:
+        logger.warning(f"namespace.csv not found at {namespace_csv_path}")
+    return namespace_map, id_to_child_map
+
+
+def load_columnar_maps(columnar_dir):
+    """Build string_map, file_map and the namespace maps from a columnar catalog export"""
+    from file_history_cleaner.lib.columnar import ColumnarTable, NULL_INT
+
+    def open_table(table_name):
+        table_dir = os.path.join(columnar_dir, table_name)
+        if not os.path.isdir(table_dir):
+            logger.warning(f"{table_name} table not found in {columnar_dir}")
+            return None
+        return ColumnarTable(table_dir)
+
+    def id_column(table, name):
+        # Keys are kept as decimal strings so they match the CSV loaders and $OF folder names
+        return ["" if value == NULL_INT else str(value) for value in table.ints(name)]
+
+    def id_rows(table):
+        if table is None:
+            return []
+        columns = [c for c in ("id", "childId", "parentId") if c in table.columns]
+        values = [id_column(table, c) for c in columns]
+        table.close()
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    string_map = {}
+    strings = open_table("string")
+    if strings is not None:
+        text_column = "string" if "string" in strings.columns else "value"
+        string_map = dict(zip(id_column(strings, "id"), strings.strings(text_column)))
+        strings.close()
+
+    file_map = {}
+    for row in id_rows(open_table("file")):
+        file_map[row["id"]] = row
+        if row.get("childId"):
+            file_map[row["childId"]] = row
+
+    namespace_map = {}
+    id_to_child_map = {}
+    for row in id_rows(open_table("namespace")):
+        child_id = row.get("childId") or row["id"]
+        namespace_map[child_id] = row
+        id_to_child_map[row["id"]] = child_id
+
+    return string_map, file_map, namespace_map, id_to_child_map
+
+
+def find_path_from_namespace(file_id, namespace_map, string_map, id_to_child_map, file_map=None):
+    """Try to find path information using namespace.csv, then file.csv as fallback with recursive parent traversal"""
+    # First check if file_id is a childId
+    if file_id in namespace_map:
+        namespace_entry = namespace_map[file_id]
+        parent_id = namespace_entry.get("parentId")
+        # Try to get the path from the parent's string entry
+        if parent_id and parent_id in string_map:
+            return string_map[parent_id]
+        # If parent not found in string_map, try to find parent's parent recursively
+        if parent_id and parent_id in namespace_map:
+            return find_path_from_namespace(parent_id, namespace_map, string_map, id_to_child_map, file_map)
+    # Check if file_id corresponds to an id field (which maps to a childId)
+    elif file_id in id_to_child_map:
+        child_id = id_to_child_map[file_id]
+        return find_path_from_namespace(child_id, namespace_map, string_map, id_to_child_map, file_map)
+    # Fallback: check file.csv for parentId and try string_map with recursive traversal
+    elif file_map and file_id in file_map:
+        file_entry = file_map[file_id]
+        parent_id = file_entry.get("parentId")
+        if parent_id and parent_id in string_map:
+            return string_map[parent_id]
+        # If parent not found in string_map, try to find parent's parent recursively in file.csv
+        if parent_id and parent_id in file_map:
+            return find_path_from_namespace(parent_id, namespace_map, string_map, id_to_child_map, file_map)
+    return None
+
+
+def sanitize_path(path):
+    """Remove null characters and other invalid characters from file paths"""
+    if path is None:
+        return None
+    
+    # Remove null characters (\0)
+    path = path.replace('\0', '')
+    
+    # Remove other invalid characters for Windows file systems
+    invalid_chars = '<>"|?*'
+    for char in invalid_chars:
+        path = path.replace(char, '_')
+    
+    # Remove leading/trailing whitespace and dots
+    path = path.strip(' .')
+    
+    # Replace multiple consecutive slashes with single slash
+    while '//' in path:
+        path = path.replace('//', '/')
+    
+    return path
+
+
+
+
+
+def copy_and_rename_files(folder_info, source_root, output_root, dry_run, namespace_csv_path=None, string_map=None, file_map=None, concurrency=None, fs=None, csv_workers=1, verifier=None, bad_paths_log="bad_paths.jsonl", archive=None, namespace_maps=None, path_filter=None, throttle=None):
+    logger.info(f"Starting file copy process. Total folders: {len(folder_info)}")
+    # Problem files are streamed to bad_paths_log as they are found
+    bad_paths = RecordSink(bad_paths_log)
+    # With concurrency set, copies are queued here and run with many I/O calls in flight
+    pending = []
+    concurrent = bool(concurrency) and not dry_run and archive is None
+    # Names already in each destination directory, listed once per directory so
+    # existence checks are set lookups instead of a stat per file
+    dest_listings = {}
+
+    def list_dest_dir(dest_dir, create):
+        names = dest_listings.get(dest_dir)
+        if names is None:
+            try:
+                names = {os.path.normcase(n) for n in os.listdir(dest_dir)}
+            except FileNotFoundError:
+                if create:
+                    os.makedirs(dest_dir, exist_ok=True)
+                names = set()
+            dest_listings[dest_dir] = names
+        return names
+    total_files = sum(len(folder["files"]) for folder in folder_info.values())
+    
+    # Load namespace data if available
+    namespace_map = {}
+    id_to_child_map = {}
+    namespace_found_count = 0
+    if namespace_maps is not None:
+        namespace_map, id_to_child_map = namespace_maps
+        logger.info(f"Using {len(namespace_map)} preloaded namespace entries")
+    elif namespace_csv_path:
+        namespace_map, id_to_child_map = load_namespace_map(namespace_csv_path, csv_workers)
+        logger.info(f"Loaded {len(namespace_map)} namespace entries")
+    
+    from tqdm import tqdm
+
+    # Create progress bar
+    pbar = tqdm(total=total_files, desc="Copying files", unit="file")
+    
+    for folder_id, folder in folder_info.items():
+        for file_entry in folder["files"]:
+            src_folder = os.path.join(source_root, folder_id)
+            src_file = os.path.join(src_folder, file_entry["name"])
+            rel_path = file_entry["path"]
+            
+            # Skip files with no path information
+            if rel_path is None:
+                # Try to find path using namespace.csv or file.csv fallback
+                if namespace_map and string_map:
+                    file_id = file_entry["id"]
+                    rel_path = find_path_from_namespace(file_id, namespace_map, string_map, id_to_child_map, file_map)
+                    if rel_path:
+                        namespace_found_count += 1
+                        #logger.info(f"Found path for file {file_entry['name']} using namespace.csv or file.csv: {rel_path}")
+                        pass
+                    else:
+                        logger.warning(f"Skipping file {file_entry['name']} in folder {folder_id}: no path information found in namespace.csv or file.csv")
+                        bad_paths.write(
+                            {
+                                "src": src_file,
+                                "reason": "no path information found in namespace.csv or file.csv",
+                            }
+                        )
+                            
+                        pbar.update(1)
+                        continue
+                else:
+                    logger.warning(f"Skipping file {file_entry['name']} in folder {folder_id}: no path information")
+                    bad_paths.write(
+                        {
+                            "src": src_file,
+                            "reason": "no path information",
+                        }
+                    )
+                    pbar.update(1)
+                    continue
+                
+            # Sanitize the path to remove null characters and other invalid characters
+            rel_path = sanitize_path(rel_path)
+            if rel_path is None or rel_path.strip() == "":
+                logger.warning(f"Skipping file {file_entry['name']} in folder {folder_id}: path is empty after sanitization")
+                bad_paths.write(
+                    {
+                        "src": src_file,
+                        "reason": "path is empty after sanitization",
+                    }
+                )
+                pbar.update(1)
+                continue
+            
+            # Remove colon from drive letter and replace backslashes with slashes, but keep original case
+            rel_path_norm = (
+                rel_path.replace(":", "").replace("\\", "/").replace("\\", "/")
+            )
+            rel_path_parts = [p for p in rel_path_norm.split("/") if p]
+
+            # $OF folders are named by id, so include/exclude rules can only be applied once the path is known
+            if path_filter and not path_filter.matches(
+                rel_path_parts, file_entry["string"] if file_entry["string"] else file_entry["name"]
+            ):
+                pbar.update(1)
+                continue
+            
+            # Validate path parts - skip if any part is too long or invalid
+            if any(len(part) > 255 for part in rel_path_parts):
+                logger.warning(f"Skipping file {file_entry['name']} in folder {folder_id}: path contains component longer than 255 characters")
+                bad_paths.write(
+                    {
+                        "src": src_file,
+                        "reason": "path contains component longer than 255 characters",
+                    }
+                )
+                pbar.update(1)
+                continue
+                
+            dest_dir = os.path.join(output_root, *rel_path_parts)
+            
+            # Check for path length issues (Windows default MAX_PATH is 260)
+            # Check both directory length and estimated final file path length
+            estimated_final_path = os.path.join(dest_dir, file_entry["string"] if file_entry["string"] else file_entry["name"])
+            if os.name == "nt" and (len(dest_dir) > 240 or len(estimated_final_path) > 255):
+                # Log and skip files with paths that are too long
+                logger.warning(f"Skipping {src_file}: path too long (length: {len(estimated_final_path)})")
+                bad_paths.write(
+                    {"src": src_file, "dest": estimated_final_path, "reason": f"path too long (length: {len(estimated_final_path)})"},
+                    kind="path too long",
+                )
+                pbar.update(1)
+                continue
+            
+            dest_names = None
+            try:
+                if not concurrent and archive is None:
+                    dest_names = list_dest_dir(dest_dir, create=not dry_run)
+            except OSError as e:
+                logger.warning(f"Failed to create directory {dest_dir}: {e}")
+                bad_paths.write(
+                    {
+                        "src": src_file,
+                        "dest": dest_dir,
+                        "reason": f"Failed to create directory: {e}",
+                    },
+                    kind="failed to create directory",
+                )
+                pbar.update(1)
+                continue
+            except Exception as e:
+                logger.error(f"Unexpected error creating directory {dest_dir}: {e}")
+                bad_paths.write(
+                    {
+                        "src": src_file,
+                        "dest": dest_dir,
+                        "reason": f"Unexpected error creating directory: {e}",
+                    },
+                    kind="unexpected error creating directory",
+                )
+                pbar.update(1)
+                continue
+            new_name = (
+                file_entry["string"] if file_entry["string"] else file_entry["name"]
+            )
+            # Sanitize the filename as well
+            new_name = sanitize_path(new_name)
+            if new_name is None or new_name.strip() == "":
+                logger.warning(f"Skipping file {file_entry['name']} in folder {folder_id}: filename is empty after sanitization")
+                bad_paths.write(
+                    {
+                        "src": src_file,
+                        "reason": "filename is empty after sanitization",
+                    }
+                )
+                pbar.update(1)
+                continue
+                
+            dest_file = os.path.join(dest_dir, new_name)
+            # Check for final path length issues (this should rarely happen now with simplified paths)
+            if os.name == "nt" and len(dest_file) > 255:
+                logger.warning(f"Skipping {dest_file}: final path still too long even with simplified path")
+                bad_paths.write(
+                    {"src": src_file, "dest": dest_file, "reason": "final path still too long"}
+                )
+                continue
+            if concurrent:
+                # The size is left to the copy job, which stats the source only when
+                # a byte rate needs it and reports a vanished source through on_done
+                pending.append((src_file, dest_dir, dest_file, None))
+                continue
+            # The source came from the folder listing, so it is only re-checked if the copy fails
+            dest_key = os.path.normcase(new_name)
+            if dest_names is not None and dest_key in dest_names:
+                logger.info(f"File already exists, overwriting: {dest_file}")
+            try:
+                if not dry_run and archive is not None:
+                    if throttle:
+                        throttle.acquire(os.path.getsize(src_file), ops=1)
+                    written = archive.add(src_file, os.path.relpath(dest_file, output_root))
+                    if verifier and written:
+                        verifier.submit(src_file, written)
+                elif not dry_run and throttle:
+                    throttle.copy2(src_file, dest_file)
+                    dest_names.add(dest_key)
+                    if verifier:
+                        verifier.submit(src_file, dest_file)
+                elif not dry_run:
+                    shutil.copy2(src_file, dest_file)
+                    dest_names.add(dest_key)
+                    if verifier:
+                        verifier.submit(src_file, dest_file)
+                # logger.info(f"Copied {src_file} -> {dest_file}")
+            except FileNotFoundError as e:
+                if os.path.exists(src_file):
+                    logger.error(f"Failed to copy {src_file} to {dest_file}: {e}")
+                    bad_paths.write({"src": src_file, "dest": dest_file, "reason": str(e)}, kind="copy failed")
+                else:
+                    logger.error(f"Source file does not exist: {src_file}")
+                    bad_paths.write(
+                        {
+                            "src": src_file,
+                            "dest": dest_file,
+                            "reason": "source file does not exist",
+                        }
+                    )
+                    continue
+            except PermissionError as e:
+                logger.warning(f"Permission denied copying {src_file} to {dest_file}: {e}")
+                bad_paths.write({"src": src_file, "dest": dest_file, "reason": f"Permission denied: {e}"}, kind="permission denied")
+            except Exception as e:
+                logger.error(f"Failed to copy {src_file} to {dest_file}: {e}")
+                bad_paths.write({"src": src_file, "dest": dest_file, "reason": str(e)}, kind="copy failed")
+                
+            # Update progress bar
+            pbar.update(1)
+
+    if pending:
+        def on_done(job, error):
+            src_file, dest_dir, dest_file, _ = job
+            if isinstance(error, FileNotFoundError):
+                logger.error(f"Source file does not exist: {src_file}")
+                bad_paths.write({"src": src_file, "dest": dest_file, "reason": "source file does not exist"})
+            elif isinstance(error, PermissionError):
+                logger.warning(f"Permission denied copying {src_file} to {dest_file}: {error}")
+                bad_paths.write({"src": src_file, "dest": dest_file, "reason": f"Permission denied: {error}"}, kind="permission denied")
+            elif error is not None:
+                logger.error(f"Failed to copy {src_file} to {dest_file}: {error}")
+                bad_paths.write({"src": src_file, "dest": dest_file, "reason": str(error)}, kind="copy failed")
+            elif verifier:
+                verifier.submit(src_file, dest_file)
+            pbar.update(1)
+
+        from file_history_cleaner.lib.async_io import copy_files_concurrently
+
+        logger.info(f"Copying {len(pending)} files with concurrency {concurrency}")
+        copy_files_concurrently(pending, concurrency, fs, on_done=on_done, throttle=throttle)
+    
+    # Close progress bar
+    pbar.close()
+    
+    # Log namespace lookup statistics
+    if namespace_map:
+        logger.info(f"Successfully found paths for {namespace_found_count} files using namespace.csv")
+    
+    logger.info(f"File copy process completed. Processed {total_files} files.")
+    bad_paths.close()
+    if bad_paths.total:
+        logger.warning(f"Found {bad_paths.total} problematic files. Written to {bad_paths_log}")
+        for reason, count in bad_paths.counts.most_common():
+            logger.warning(f"  {count} x {reason}")
+    else:
+        logger.info("No problematic files found.")
+
+
+def resolve_of_path(file_entry, string_map, namespace_maps=None, file_map=None):
+    """((folder parts, file name), None) for the path an $OF entry was backed up from, or (None, reason)"""
+    rel_path = file_entry["path"]
+    if rel_path is None:
+        namespace_map, id_to_child_map = namespace_maps or ({}, {})
+        rel_path = find_path_from_namespace(file_entry["id"], namespace_map, string_map, id_to_child_map, file_map)
+        if not rel_path:
+            return None, "no path information found in namespace.csv or file.csv"
+    rel_path = sanitize_path(rel_path)
+    if not rel_path or not rel_path.strip():
+        return None, "path is empty after sanitization"
+    parts = [p for p in rel_path.replace(":", "").replace("\\", "/").split("/") if p]
+    name = sanitize_path(file_entry["string"] if file_entry["string"] else file_entry["name"])
+    if not name or not name.strip():
+        return None, "filename is empty after sanitization"
+    return (parts, name), None
+
+
+def plan_unified(directory, catalog_dir, directories_to_skip=[], has_data_directory=True, deleted_sink=None, path_filter=None, columnar_dir=None, csv_workers=1, bad_paths_log="bad_paths.jsonl"):
+    """
+    One plan for a whole target. The Data tree is scanned as in main.py, every
+    $OF entry is resolved with the catalog maps to the logical path it was backed
+    up from, and both go into the same version index (paths are matched
+    case-insensitively, as on Windows). main.mark_versions then keeps the newest
+    version of each path, the Data copy when timestamps tie, so restoring the
+    plan copies every path exactly once.
+    """
+    from file_history_cleaner.lib.version_names import SnapshotTable, add_version
+    from file_history_cleaner.main import data_directory_of, decode_string, encode_string, mark_versions, scan_directory
+
+    data_directory = data_directory_of(directory, has_data_directory)
+    of_directory = os.path.join(data_directory, "$OF")
+    snapshots = SnapshotTable()
+    json_data = scan_directory(directory, directories_to_skip, has_data_directory, path_filter, snapshots)
+    if not os.path.isdir(of_directory):
+        logger.info(f"No $OF folder in {data_directory}, planning from Data only")
+        return mark_versions(json_data, deleted_sink)
+
+    string_csv_path = os.path.join(catalog_dir, "string.csv")
+    file_csv_path = os.path.join(catalog_dir, "file.csv")
+    if columnar_dir:
+        string_map, file_map, namespace_map, id_to_child_map = load_columnar_maps(columnar_dir)
+    else:
+        string_map = load_string_map(string_csv_path, csv_workers)
+        file_map = load_file_map(file_csv_path, workers=csv_workers)
+        namespace_map, id_to_child_map = load_namespace_map(os.path.join(catalog_dir, "namespace.csv"), csv_workers)
+    folder_info = list_folders_with_files_and_strings(of_directory, string_csv_path, file_csv_path, string_map=string_map)
+
+    files = json_data["files"]
+    folded_ids = {decode_string(base_id).casefold(): base_id for base_id in files}
+    of_versions = 0
+    shared_paths = set()
+    with RecordSink(bad_paths_log) as bad_paths:
+        for folder_id, folder in folder_info.items():
+            for file_entry in folder["files"]:
+                src_path = os.path.abspath(os.path.join(of_directory, folder_id, file_entry["name"]))
+                resolved, reason = resolve_of_path(file_entry, string_map, (namespace_map, id_to_child_map), file_map)
+                if resolved is None:
+                    bad_paths.write({"src": src_path, "reason": reason})
+                    continue
+                parts, name = resolved
+                base_name, snapshot = snapshots.parse(name)
+                if path_filter and not path_filter.matches(parts, base_name):
+                    continue
+                try:
+                    size = os.stat(src_path).st_size
+                except OSError as e:
+                    bad_paths.write({"src": src_path, "reason": str(e)}, kind="stat failed")
+                    continue
+
+                dst_path = os.path.join(*parts, base_name)
+                base_id = folded_ids.setdefault(dst_path.casefold(), encode_string(dst_path))
+                versions = files.setdefault(base_id, {"versions": {}})["versions"]
+                if any(v.get("source") != "$OF" for v in versions.values()):
+                    shared_paths.add(base_id)
+                # The stored name carries the stamp, the catalog's name may too
+                snapshot = snapshots.parse(file_entry["name"])[1] or snapshot
+                add_version(versions, snapshot.key if snapshot else "v_unknown", {
+                    "src_folder": os.path.join("$OF", folder_id),
+                    "src_path": src_path,
+                    "dst_path": dst_path,
+                    "size": size,
+                    "timestamp": snapshot.iso if snapshot else None,
+                    "source": "$OF",
+                })
+                json_data["total_count"] += 1
+                json_data["total_size"] += size
+                of_versions += 1
+
+    mark_versions(json_data, deleted_sink)
+    of_kept = sum(
+        1
+        for file_data in files.values()
+        for version in file_data["versions"].values()
+        if version.get("source") == "$OF" and not version["to_delete"]
+    )
+    logger.info(
+        f"Merged {of_versions} $OF versions into the Data plan: {len(shared_paths)} paths are in both, "
+        f"{of_kept} paths will be restored from $OF"
+    )
+    if bad_paths.total:
+        logger.warning(f"{bad_paths.total} $OF files could not be placed, see {bad_paths_log}")
+    return json_data
+
+
+def clean_id(id_str):
+    return id_str.strip(" \t\n\r'\"")
+
+
+def main(directory, catalog_dir, output_dir=None, dry_run=False, concurrency=None, csv_workers=1, verify=None, archive_format=None, export_tables=False, log_file="catalog.log", columnar_dir=None, include_paths=(), exclude_paths=(), max_rate=None, max_ops=None, throttle_file=None, unified=False, deleted_log="deleted_files.jsonl", archive_large_files=None):
+    setup_logging(log_file)
+    logger.info("Starting catalog processing...")
+    filepath = os.path.join(catalog_dir, "file.csv")
+    string_csv_path = os.path.join(catalog_dir, "string.csv")
+    namespace_csv_path = os.path.join(catalog_dir, "namespace.csv")
+    of_directory = os.path.join(directory, "Data", "$OF")
+    edb_path = os.path.join(directory, "Configuration", "Catalog1.edb")
+    tables = ["file", "string", "namespace"]
+    
+    logger.info(f"Processing directory: {directory}")
+    logger.info(f"Output directory: {output_dir}")
+    logger.info(f"Dry run mode: {dry_run}")
+    
+    if export_tables and columnar_dir:
+        from file_history_cleaner.lib.columnar import export_table_to_columnar
+
+        for table in tables:
+            logger.info(f"Exporting table: {table}")
+            export_table_to_columnar(edb_path, table, columnar_dir)
+    elif export_tables:
+        from file_history_cleaner.lib.edb_extractor import export_table_to_csv
+
+        os.makedirs(catalog_dir, exist_ok=True)
+        for table in tables:
+            logger.info(f"Exporting table: {table}")
+            export_table_to_csv(edb_path, table, os.path.join(catalog_dir, f"{table}.csv"))
+
+    if unified:
+        # $OF and Data versions in one plan, each path restored once, see plan_unified
+        from file_history_cleaner.main import restore
+
+        # Versions superseded by a newer copy of the same path, from $OF or Data
+        with RecordSink(deleted_log) as deleted_sink:
+            json_data = plan_unified(
+                directory,
+                catalog_dir,
+                deleted_sink=deleted_sink,
+                path_filter=PathFilter(include_paths, exclude_paths),
+                columnar_dir=columnar_dir,
+                csv_workers=csv_workers,
+            )
+        if output_dir:
+            from file_history_cleaner.lib.throttle import open_throttle
+
+            throttle = open_throttle(max_rate, max_ops, throttle_file) if not dry_run else None
+            restore(json_data, output_dir, dry_run, concurrency, verify, archive_format=archive_format, archive_large_files=archive_large_files, throttle=throttle)
+        logger.info("Catalog processing completed.")
+        return json_data
+
+    namespace_maps = None
+    if columnar_dir:
+        # Memory-mapped columns, nothing to parse
+        string_map, file_map, namespace_map, id_to_child_map = load_columnar_maps(columnar_dir)
+        namespace_maps = (namespace_map, id_to_child_map)
+        id_index = file_map
+    else:
+        # Load the string map once and share it between listing and copying
+        string_map = load_string_map(string_csv_path, csv_workers)
+        id_index, parent_index = parse_csv(filepath, ("id", "parentId"), csv_workers)
+    sorted_folder_info = list_folders_with_files_and_strings(
+        of_directory, string_csv_path, filepath, string_map=string_map
+    )
+
+    for folder, info in sorted_folder_info.items():
+        #logger.info(f"\nFolder: {folder}, File Count: {info['count']}, Files:")
+        #for file_entry in info["files"]:
+        #    logger.debug(f"  {file_entry}")
+        target_id = clean_id(folder)
+
+        if target_id in id_index:
+            pass
+
+            #children = parent_index.get(target_id, [])
+        else:
+            logger.warning(f"ID {target_id} not found.")
+
+    if output_dir:
+        logger.info("Starting file copy process...")
+        if not columnar_dir:
+            file_map = load_file_map(filepath, workers=csv_workers)
+        # Only the copy loads the process pool, archive and throttle modules
+        from file_history_cleaner.lib.archive_writer import ArchiveWriter
+        from file_history_cleaner.lib.throttle import open_throttle
+        from file_history_cleaner.lib.verify import Verifier
+
+        verifier = Verifier(verify, report_path="verify_report.jsonl") if verify and not dry_run else None
+        archive = ArchiveWriter(output_dir, archive_format, large_file_threshold=archive_large_files, verifier=verifier) if archive_format and not dry_run else None
+        throttle = open_throttle(max_rate, max_ops, throttle_file) if not dry_run else None
+        copy_and_rename_files(sorted_folder_info, of_directory, output_dir, dry_run, namespace_csv_path, string_map, file_map, concurrency, csv_workers=csv_workers, verifier=verifier, archive=archive, namespace_maps=namespace_maps, path_filter=PathFilter(include_paths, exclude_paths), throttle=throttle)
+        if throttle:
+            logger.info(throttle.report())
+        if archive:
+            files_archived, archived_size, shards = archive.close()
+            logger.info(f"Archived {files_archived} files ({archived_size / (1024 ** 3):.2f} GB) into {shards} archives in {output_dir}")
+        if verifier:
+            checked, mismatches = verifier.close()
+            logger.info(f"Verified {checked} copied files, {mismatches} mismatches written to verify_report.jsonl")
+            if mismatches:
+                logger.warning(f"{mismatches} copied files do not match their source, see verify_report.jsonl")
+    
+    logger.info("Catalog processing completed.")
+
+
+if __name__ == "__main__":
+    #catalog_dir = r".\catalog_data"
+    catalog_dir = r".\ps_CHEESEMACHINE"
+    #catalog_dir = r".\ps_JAKE-E7450"  # Change this to your catalog directory
+    #directory = r"E:\JAKE-E7450"  # Change this to your directory
+    directory = r"D:\FileHistory\Jake\CHEESEMACHINE"
+    output_dir = f'./output_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    dry_run = False
+    concurrency = None  # e.g. 32 for SMB/NFS targets, None copies one file at a time
+    csv_workers = 1  # processes used to parse large string.csv/file.csv exports
+    verify = None  # "hash" or "size" to check each copy while copying continues
+    archive_format = None  # "tar", "tar.gz", "tar.bz2", "tar.xz" or "zip" to pack output into archives
+    archive_large_files = None  # bytes; files at least this big stay plain files in archive mode
+    export_tables = False  # re-export file/string/namespace from Catalog1.edb into catalog_dir first
+    # Restored paths to keep or drop, same rules as main.py, e.g. [r"C\Users\Jake\Documents"]
+    include_paths = []
+    exclude_paths = []
+    # Copy speed limits, e.g. "50M" bytes/s and 200 files/s; None is unlimited. Edit the
+    # throttle file (bytes_per_second = 20M) to change them while the copy runs
+    max_rate = None
+    max_ops = None
+    throttle_file = None
+    # Also scan Data and restore each path once, from $OF or Data, whichever is newest
+    unified = False
+    deleted_log = "deleted_files.jsonl"  # with unified, where superseded versions are listed
+
+    # The same run is available without editing this file: fhc recover TARGET --catalog-dir DIR --output DIR
+    main(
+        directory,
+        catalog_dir,
+        output_dir,
+        dry_run,
+        concurrency,
+        csv_workers,
+        verify,
+        archive_format,
+        export_tables,
+        include_paths=include_paths,
+        exclude_paths=exclude_paths,
+        max_rate=max_rate,
+        max_ops=max_ops,
+        throttle_file=throttle_file,
+        unified=unified,
+        deleted_log=deleted_log,
+        archive_large_files=archive_large_files,
+    )
@@ -0,0 +1,268 @@
+"""
+fhc: command line entry point for file-history-cleaner.
+
+    fhc scan TARGET [TARGET ...]              report what would be kept and deleted
+    fhc plan TARGET [TARGET ...] -o PLAN      write the keep/delete plan as JSON
+    fhc copy TARGET [TARGET ...] --output DIR restore the newest versions
+    fhc recover TARGET --catalog-dir DIR      recover $OF files using the catalog
+    fhc export TARGET --output-dir DIR        export Catalog1.edb tables to CSV
+    fhc watch TARGET --output DIR             keep restoring new versions as they arrive
+
+Each subcommand imports only the modules it needs, so short commands start quickly.
+"""
+import argparse
+import os
+import sys
+
+ARCHIVE_CHOICES = ["tar", "tar.gz", "tar.bz2", "tar.xz", "zip"]
+
+
+def add_target_arguments(parser):
+    parser.add_argument("targets", nargs="+", metavar="TARGET", help="File History target (the folder that contains Data)")
+    parser.add_argument("--skip", action="append", default=[], metavar="NAME", help="directory name to skip, can be repeated")
+    parser.add_argument("--no-data-dir", action="store_true", help="TARGET is the Data directory itself")
+    parser.add_argument("--workers-per-disk", type=int, default=1, help="scan workers per source disk with several targets")
+    parser.add_argument("--deleted-log", default="deleted_files.jsonl", help="where superseded versions are listed")
+    parser.add_argument(
+        "--catalog",
+        nargs="?",
+        const="",
+        metavar="SOURCE",
+        help="plan from the catalog instead of stat-ing Data: the target's Catalog1.edb, or an .edb, CSV or columnar export",
+    )
+    parser.add_argument(
+        "--memory-budget", type=int, metavar="MB", help="plan through sorted runs on disk, keeping memory under MB"
+    )
+    parser.add_argument(
+        "--find-identical", action="store_true", help="report versions byte-identical to another version of the same file"
+    )
+    parser.add_argument("--hash-workers", type=int, help="processes hashing versions for --find-identical")
+    add_filter_arguments(parser)
+
+
+def add_filter_arguments(parser):
+    parser.add_argument("--include", action="append", default=[], metavar="PATH", help="only restore paths under PATH (prefix or glob, relative to Data), can be repeated")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATH", help="never restore paths under PATH (prefix or glob, relative to Data), can be repeated")
+
+
+def add_throttle_arguments(parser):
+    parser.add_argument("--max-rate", metavar="RATE", help="copy at most RATE bytes/s, e.g. 50M")
+    parser.add_argument("--max-ops", metavar="N", help="copy or delete at most N files/s")
+    parser.add_argument("--throttle-file", metavar="PATH", help="read limits from PATH (bytes_per_second = 50M) while running; SIGHUP re-reads it")
+
+
+def open_throttle(args):
+    from file_history_cleaner.lib.throttle import open_throttle
+
+    if args.dry_run:
+        return None
+    return open_throttle(args.max_rate, args.max_ops, args.throttle_file)
+
+
+def build_plan(args, snapshots=None):
+    if args.catalog and len(args.targets) > 1:
+        sys.exit("fhc: --catalog SOURCE needs a single TARGET; use --catalog alone to read each target's Catalog1.edb")
+    from file_history_cleaner.main import plan
+    from file_history_cleaner.lib.path_filter import PathFilter
+    from file_history_cleaner.lib.sinks import RecordSink
+
+    with RecordSink(args.deleted_log) as deleted_sink:
+        return plan(
+            args.targets,
+            args.skip,
+            save_json=False,
+            has_data_directory=not args.no_data_dir,
+            deleted_sink=deleted_sink,
+            workers_per_disk=args.workers_per_disk,
+            path_filter=PathFilter(args.include, args.exclude),
+            catalog_source=args.catalog,
+            memory_budget=args.memory_budget * 1024 ** 2 if args.memory_budget else None,
+            find_identical=args.find_identical,
+            hash_workers=args.hash_workers,
+            snapshots=snapshots,
+        )
+
+
+def cmd_scan(args):
+    from file_history_cleaner.main import print_plan_totals, print_snapshot_totals
+    from file_history_cleaner.lib.version_names import SnapshotTable
+
+    snapshots = SnapshotTable() if args.snapshots else None
+    print_plan_totals(build_plan(args, snapshots))
+    if snapshots is not None:
+        print_snapshot_totals(snapshots)
+
+
+def cmd_plan(args):
+    from file_history_cleaner.main import print_plan_totals, save_json_data
+
+    folder_info = build_plan(args)
+    save_json_data(folder_info, args.output)
+    print_plan_totals(folder_info)
+
+
+def cmd_copy(args):
+    from file_history_cleaner.main import restore, save_json_data
+
+    folder_info = build_plan(args)
+    if args.save_plan:
+        save_json_data(folder_info, args.save_plan)
+    restore(
+        folder_info,
+        args.output,
+        args.dry_run,
+        args.concurrency,
+        args.verify,
+        args.schedule,
+        args.archive,
+        args.archive_large_files,
+        open_throttle(args),
+    )
+
+
+def cmd_recover(args):
+    from file_history_cleaner import catalog
+
+    catalog.main(
+        args.target,
+        args.catalog_dir,
+        args.output,
+        args.dry_run,
+        args.concurrency,
+        args.csv_workers,
+        args.verify,
+        args.archive,
+        args.export,
+        args.log_file,
+        args.columnar_dir,
+        args.include,
+        args.exclude,
+        args.max_rate,
+        args.max_ops,
+        args.throttle_file,
+        args.unified,
+        args.deleted_log,
+        args.archive_large_files,
+    )
+
+
+def cmd_export(args):
+    from file_history_cleaner.lib.edb_extractor import export_table_to_csv
+
+    if args.target.lower().endswith(".edb"):
+        edb_path = args.target
+    else:
+        edb_path = os.path.join(args.target, "Configuration", "Catalog1.edb")
+    os.makedirs(args.output_dir, exist_ok=True)
+    for table in args.tables:
+        print(f"Exporting table: {table}")
+        if args.format == "columnar":
+            from file_history_cleaner.lib.columnar import export_table_to_columnar
+
+            export_table_to_columnar(edb_path, table, args.output_dir)
+        else:
+            export_table_to_csv(edb_path, table, os.path.join(args.output_dir, f"{table}.csv"), args.workers)
+
+
+def cmd_watch(args):
+    from file_history_cleaner.main import watch
+    from file_history_cleaner.lib.path_filter import PathFilter
+    from file_history_cleaner.lib.sinks import RecordSink
+
+    with RecordSink(args.deleted_log) as deleted_sink:
+        watch(
+            args.target,
+            args.output,
+            args.skip,
+            has_data_directory=not args.no_data_dir,
+            path_filter=PathFilter(args.include, args.exclude),
+            deleted_sink=deleted_sink,
+            interval=args.interval,
+            polling=args.polling,
+            delete_superseded=args.delete_superseded,
+            dry_run=args.dry_run,
+            throttle=open_throttle(args),
+        )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fhc", description="Clean up and restore Windows File History backups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser("scan", help="report what would be kept and deleted")
+    add_target_arguments(scan)
+    scan.add_argument("--snapshots", action="store_true", help="also list versions and bytes per backup run")
+    scan.set_defaults(func=cmd_scan)
+
+    plan = subparsers.add_parser("plan", help="write the keep/delete plan as JSON")
+    add_target_arguments(plan)
+    plan.add_argument("-o", "--output", default="output.json", help="plan file to write")
+    plan.set_defaults(func=cmd_plan)
+
+    copy = subparsers.add_parser("copy", help="restore the newest version of every file")
+    add_target_arguments(copy)
+    copy.add_argument("--output", required=True, help="restore directory")
+    copy.add_argument("--dry-run", action="store_true")
+    copy.add_argument("--save-plan", metavar="PATH", help="also write the plan JSON")
+    copy.add_argument("--concurrency", type=int, help="I/O calls kept in flight, for network shares")
+    copy.add_argument("--verify", choices=["hash", "size"], help="check copies while copying")
+    copy.add_argument("--schedule", action="store_true", help="copy in source disk order")
+    copy.add_argument("--archive", choices=ARCHIVE_CHOICES, help="pack output into archives")
+    copy.add_argument("--archive-large-files", type=int, metavar="BYTES", help="keep files this big as plain files")
+    add_throttle_arguments(copy)
+    copy.set_defaults(func=cmd_copy)
+
+    recover = subparsers.add_parser("recover", help="recover $OF files using the exported catalog")
+    recover.add_argument("target", metavar="TARGET")
+    recover.add_argument("--catalog-dir", required=True, help="directory with file.csv, string.csv and namespace.csv")
+    recover.add_argument("--output", required=True, help="restore directory")
+    recover.add_argument("--dry-run", action="store_true")
+    recover.add_argument("--concurrency", type=int, help="I/O calls kept in flight, for network shares")
+    recover.add_argument("--csv-workers", type=int, default=1, help="processes used to parse the catalog CSVs")
+    recover.add_argument("--verify", choices=["hash", "size"], help="check copies while copying")
+    recover.add_argument("--archive", choices=ARCHIVE_CHOICES, help="pack output into archives")
+    recover.add_argument("--archive-large-files", type=int, metavar="BYTES", help="keep files this big as plain files")
+    recover.add_argument("--export", action="store_true", help="export the catalog tables from Catalog1.edb first")
+    recover.add_argument("--columnar-dir", help="load (or with --export, write) the catalog in columnar form")
+    recover.add_argument("--log-file", default="catalog.log")
+    recover.add_argument("--unified", action="store_true", help="also restore Data, copying each path once from $OF or Data")
+    recover.add_argument("--deleted-log", default="deleted_files.jsonl", help="with --unified, where superseded versions are listed")
+    add_filter_arguments(recover)
+    add_throttle_arguments(recover)
+    recover.set_defaults(func=cmd_recover)
+
+    export = subparsers.add_parser("export", help="export Catalog1.edb tables to CSV")
+    export.add_argument("target", metavar="TARGET", help="File History target or path to a .edb file")
+    export.add_argument("--output-dir", required=True)
+    export.add_argument(
+        "--tables", nargs="+", default=["backupset", "global", "library", "namespace", "file", "string"]
+    )
+    export.add_argument("--workers", type=int, default=1, help="processes reading record ranges of each table")
+    export.add_argument("--format", choices=["csv", "columnar"], default="csv", help="columnar writes .npy/.blob column files")
+    export.set_defaults(func=cmd_export)
+
+    watch = subparsers.add_parser("watch", help="keep restoring new versions as File History writes them")
+    watch.add_argument("target", metavar="TARGET", help="File History target (the folder that contains Data)")
+    watch.add_argument("--output", required=True, help="restore directory")
+    watch.add_argument("--skip", action="append", default=[], metavar="NAME", help="directory name to skip, can be repeated")
+    watch.add_argument("--no-data-dir", action="store_true", help="TARGET is the Data directory itself")
+    watch.add_argument("--deleted-log", default="deleted_files.jsonl", help="where superseded versions are listed")
+    watch.add_argument("--interval", type=float, default=5.0, help="seconds between polls, and between checks for Ctrl+C")
+    watch.add_argument("--polling", action="store_true", help="poll instead of using inotify, e.g. for network shares")
+    watch.add_argument("--delete-superseded", action="store_true", help="delete superseded versions from Data")
+    watch.add_argument("--dry-run", action="store_true")
+    add_filter_arguments(watch)
+    add_throttle_arguments(watch)
+    watch.set_defaults(func=cmd_watch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tarfile
+import zipfile
+
+ARCHIVE_FORMATS = {
+    "tar": ("w", ".tar"),
+    "tar.gz": ("w:gz", ".tar.gz"),
+    "tar.bz2": ("w:bz2", ".tar.bz2"),
+    "tar.xz": ("w:xz", ".tar.xz"),
+    "zip": (zipfile.ZIP_DEFLATED, ".zip"),
+}
+
+
+class ArchiveWriter:
+    """
+    Streams restored files into sharded tar or zip archives under output_root
+    instead of creating one file each. index.jsonl records which shard holds
+    each path. Files of at least large_file_threshold bytes are written as
+    plain files when the threshold is set. With a lib.verify.Verifier, each
+    shard's members are checked against their sources once the shard is closed.
+    """
+
+    def __init__(self, output_root, archive_format="tar", shard_size=4 * 1024 ** 3, large_file_threshold=None, prefix="restore", verifier=None):
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {archive_format}")
+        self.output_root = output_root
+        self.archive_format = archive_format
+        self.shard_size = shard_size
+        self.large_file_threshold = large_file_threshold
+        self.prefix = prefix
+        self.verifier = verifier
+        self.members = []  # (src, arcname) of the open shard, for the verifier
+        self.shard = None
+        self.shard_name = None
+        self.shard_bytes = 0
+        self.shard_count = 0
+        self.files_written = 0
+        self.bytes_written = 0
+        os.makedirs(output_root, exist_ok=True)
+        self.index = open(os.path.join(output_root, "index.jsonl"), "w", encoding="utf-8")
+
+    def _open_shard(self):
+        mode, extension = ARCHIVE_FORMATS[self.archive_format]
+        self.shard_name = f"{self.prefix}-{self.shard_count:04d}{extension}"
+        path = os.path.join(self.output_root, self.shard_name)
+        if self.archive_format == "zip":
+            self.shard = zipfile.ZipFile(path, "w", compression=mode, allowZip64=True)
+        else:
+            self.shard = tarfile.open(path, mode)
+        self.shard_count += 1
+        self.shard_bytes = 0
+
+    def _close_shard(self):
+        if self.shard is not None:
+            self.shard.close()
+            self.shard = None
+            if self.verifier and self.members:
+                self.verifier.submit_archive(os.path.join(self.output_root, self.shard_name), self.members)
+            self.members = []
+
+    def add(self, src_file, rel_path, size=None):
+        """
+        Store src_file as rel_path. Returns the plain file path when the file was
+        written outside the archives, otherwise None.
+        """
+        if size is None:
+            size = os.path.getsize(src_file)
+        arcname = rel_path.replace("\\", "/")
+
+        if self.large_file_threshold is not None and size >= self.large_file_threshold:
+            dest_file = os.path.join(self.output_root, *arcname.split("/"))
+            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
+            shutil.copy2(src_file, dest_file)
+            archive_name = None
+        else:
+            if self.shard is None or (self.shard_bytes and self.shard_bytes + size > self.shard_size):
+                self._close_shard()
+                self._open_shard()
+            if self.archive_format == "zip":
+                self.shard.write(src_file, arcname)
+            else:
+                self.shard.add(src_file, arcname=arcname, recursive=False)
+            self.shard_bytes += size
+            if self.verifier:
+                self.members.append((src_file, arcname))
+            dest_file = None
+            archive_name = self.shard_name
+
+        self.files_written += 1
+        self.bytes_written += size
+        self.index.write(
+            json.dumps({"path": arcname, "archive": archive_name, "size": size, "src": src_file}, ensure_ascii=False)
+            + "\n"
+        )
+        return dest_file
+
+    def close(self):
+        """Finish the open shard and the index; returns (files, bytes, shards)"""
+        self._close_shard()
+        self.index.close()
+        return self.files_written, self.bytes_written, self.shard_count
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LocalFileSystem:
+    """Blocking filesystem calls used by the concurrent copy path"""
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def makedirs(self, path):
+        os.makedirs(path, exist_ok=True)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def copy2(self, src, dst):
+        shutil.copy2(src, dst)
+
+
+class LatencyFileSystem(LocalFileSystem):
+    """Local filesystem that waits before every call, to mimic an SMB/NFS round trip"""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+
+    def stat(self, path):
+        time.sleep(self.latency)
+        return super().stat(path)
+
+    def makedirs(self, path):
+        time.sleep(self.latency)
+        super().makedirs(path)
+
+    def listdir(self, path):
+        time.sleep(self.latency)
+        return super().listdir(path)
+
+    def copy2(self, src, dst):
+        time.sleep(self.latency)
+        super().copy2(src, dst)
+
+
+async def _copy_jobs(jobs, concurrency, fs, on_done, stop_on_error, throttle):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending_dirs = {}
+    job_iter = iter(jobs)
+    errors = []
+    copied = [0]
+
+    def run(func, *args):
+        return loop.run_in_executor(executor, func, *args)
+
+    def make_and_list(dest_dir):
+        fs.makedirs(dest_dir)
+        return {os.path.normcase(name) for name in fs.listdir(dest_dir)}
+
+    async def dest_names(dest_dir):
+        # Jobs sharing a directory wait on a single makedirs and listing instead of
+        # each issuing its own calls; existence checks are then set lookups
+        future = pending_dirs.get(dest_dir)
+        if future is None:
+            future = asyncio.ensure_future(run(make_and_list, dest_dir))
+            pending_dirs[dest_dir] = future
+        return await future
+
+    async def copy_one(job):
+        src_file, dest_dir, dest_file, size = job
+        names = await dest_names(dest_dir)
+        dest_key = os.path.normcase(os.path.basename(dest_file))
+        if dest_key in names:
+            print(f"File already exists, overwriting: {dest_file}")
+        if throttle:
+            if size is None and throttle.bytes.rate:
+                size = (await run(fs.stat, src_file)).st_size
+            # Waits in the pool thread, so a throttled job also holds its concurrency slot
+            await run(throttle.acquire, size or 0, 1)
+        # A source that disappeared fails here with FileNotFoundError
+        await run(fs.copy2, src_file, dest_file)
+        names.add(dest_key)
+
+    async def worker():
+        while not (stop_on_error and errors):
+            job = next(job_iter, None)
+            if job is None:
+                return
+            try:
+                await copy_one(job)
+                copied[0] += 1
+                error = None
+            except Exception as e:
+                errors.append((job, e))
+                error = e
+            if on_done:
+                on_done(job, error)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        executor.shutdown(wait=True)
+    return copied[0], errors
+
+
+def copy_files_concurrently(jobs, concurrency=16, fs=None, on_done=None, stop_on_error=False, throttle=None):
+    """
+    Copy (src_file, dest_dir, dest_file, size) jobs keeping up to `concurrency`
+    filesystem calls in flight. Returns (files_copied, [(job, exception), ...]).
+    A shared lib.throttle.Throttle charges each job's size and one operation
+    before its copy starts; a size of None is taken from a stat of the source,
+    and only while a byte rate is set.
+    """
+    if fs is None:
+        fs = LocalFileSystem()
+    return asyncio.run(
+        _copy_jobs(jobs, max(1, concurrency), fs, on_done, stop_on_error, throttle)
+    )
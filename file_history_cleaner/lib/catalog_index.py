@@ -0,0 +1,293 @@
+"""
+Read the backed-up versions straight from the File History catalog, so a plan
+can be built without walking and stat-ing the Data tree.
+
+The catalog can be given as Catalog1.edb itself (one sequential read through
+pyesedb), a directory of CSV exports (file.csv, string.csv, namespace.csv) or
+a columnar export (see lib/columnar.py).
+"""
+import itertools
+import os
+import sys
+from datetime import datetime
+
+from file_history_cleaner.lib.columnar import NULL_INT, ColumnarTable, column_kind, record_to_values
+from file_history_cleaner.lib.external_sort import estimate_size
+from file_history_cleaner.lib.edb_extractor import filetime_to_dt, iter_table_rows, open_table
+from file_history_cleaner.lib.fast_csv import iter_columns, read_header
+
+# First column present wins
+SIZE_COLUMNS = ("size", "fileSize")
+# Int32 backupset ids, not times: a version's time is its backupset's timestamp
+BACKUPSET_COLUMNS = ("tCaptured", "tQueued")
+TEXT_COLUMNS = ("string", "value")
+HEX_DIGITS = set("0123456789abcdefABCDEF")
+# Byte width of the integer columns (catalog.ps1 reads them with RetrieveColumnAsInt16/32/64).
+# export_table_to_csv writes the ones it does not convert as raw little-endian hex of this width.
+INT_WIDTHS = {
+    "id": 4, "parentId": 4, "childId": 4, "nameId": 4, "state": 2, "status": 2,
+    "fileSize": 8, "tQueued": 4, "tCaptured": 4, "tUpdated": 4, "tCreated": 4,
+    "tVisible": 4, "fileAttrib": 4, "fileRecordId": 4, "usn": 8,
+}
+HEX_SAMPLE_ROWS = 1000
+# How PowerShell's ConvertTo-Csv may write a DateTime, depending on the culture
+DATETIME_FORMATS = ("%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+
+def _as_int(value):
+    """An int, or a decimal string (hex columns are decoded by _csv_rows) to int"""
+    if value is None or value == NULL_INT:
+        return None
+    if isinstance(value, int):
+        return value
+    value = str(value).strip(" \t\r\n'\"")
+    return int(value) if value.lstrip("-").isdigit() else None
+
+
+def _as_datetime(value):
+    """FILETIME (int) or a date string (ISO or PowerShell's) to a naive UTC datetime, whole seconds"""
+    if value is None or value == NULL_INT or value == "":
+        return None
+    try:
+        filetime = _as_int(value)
+        if filetime is not None:
+            if filetime <= 0:
+                return None
+            dt = filetime_to_dt(filetime)
+        else:
+            dt = _parse_date(str(value).strip())
+    except (ValueError, OverflowError):
+        return None
+    return dt.replace(microsecond=0) if dt else None
+
+
+def _parse_date(text):
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for date_format in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _decode(name, value):
+    # Text comes back UTF-8 encoded, binary columns (hash) are kept as hex like the CSV export
+    if not isinstance(value, bytes):
+        return value
+    return value.decode("utf-8", "replace") if column_kind(name) == "str" else value.hex()
+
+
+def _edb_rows(edb_file, table_name):
+    esedb, table = open_table(edb_file, table_name)
+    try:
+        if table is None:
+            return
+        column_names = [
+            table.get_column(col_idx).get_name()
+            for col_idx in range(table.get_number_of_columns())
+        ]
+        for _, values in iter_table_rows(table, table_name, convert=record_to_values):
+            if values is None:
+                break
+            yield {name: _decode(name, value) for name, value in zip(column_names, values)}
+    finally:
+        esedb.close()
+
+
+def _columnar_rows(table_dir, columns):
+    table = ColumnarTable(table_dir)
+    iterators = []
+    try:
+        names = [name for name in columns if name in table.columns]
+        for name in names:
+            if table.columns[name] == "int":
+                iterators.append(iter(table.ints(name)))
+            elif table.columns[name] == "str":
+                iterators.append(table.strings(name))
+            else:
+                iterators.append(bytes(value).hex() for value in table.blobs(name))
+        for values in zip(*iterators):
+            yield dict(zip(names, values))
+    finally:
+        # The iterators hold views of the maps, which cannot be closed while exported
+        del iterators
+        table.close()
+
+
+def _hex_columns(sample, names):
+    """
+    Columns written as raw little-endian hex. A column qualifies when every
+    value is exactly twice the column's byte width long; that is proof on its
+    own once some value could not be decimal (a leading zero or a hex letter).
+    If any column of the file is proven hex, the file came from
+    export_table_to_csv and its other fixed-width columns are hex too, even
+    all-digit ones like "11000000" (17). Decimal exports vary in length.
+    """
+    fixed_width = {}
+    proven = False
+    for i, name in enumerate(names):
+        width = INT_WIDTHS.get(name)
+        values = [row[i] for row in sample if row[i] != ""]
+        if not width or not values:
+            continue
+        if all(len(v) == 2 * width and set(v) <= HEX_DIGITS for v in values):
+            fixed_width[i] = width
+            proven = proven or any(v[0] == "0" or not v.isdigit() for v in values)
+    return fixed_width if proven else {}
+
+
+def _csv_rows(csv_path, columns):
+    header, _ = read_header(csv_path)
+    names = [name for name in columns if name in header]
+    rows = iter_columns(csv_path, names)
+    sample = list(itertools.islice(rows, HEX_SAMPLE_ROWS))
+    hex_columns = _hex_columns(sample, names)
+    for values in itertools.chain(sample, rows):
+        if hex_columns:
+            values = list(values)
+            for i in hex_columns:
+                if values[i]:
+                    values[i] = int.from_bytes(bytes.fromhex(values[i]), "little")
+        yield dict(zip(names, values))
+
+
+def iter_catalog_rows(catalog_source, table_name, columns):
+    """Yield one dict per row of table_name, holding whichever of columns the table has"""
+    if os.path.isfile(catalog_source):
+        yield from _edb_rows(catalog_source, table_name)
+        return
+    table_dir = os.path.join(catalog_source, table_name)
+    if os.path.isfile(os.path.join(table_dir, "meta.json")):
+        yield from _columnar_rows(table_dir, columns)
+        return
+    csv_path = os.path.join(catalog_source, f"{table_name}.csv")
+    if os.path.isfile(csv_path):
+        yield from _csv_rows(csv_path, columns)
+        return
+    print(f"[WARN] Catalog table {table_name} not found in {catalog_source}")
+
+
+def _first(row, names):
+    for name in names:
+        if row.get(name) not in (None, "", NULL_INT):
+            return row[name]
+    return None
+
+
+def load_backupset_times(catalog_source):
+    """backupset id -> naive UTC datetime of that backup run (one row per run, so small)"""
+    times = {}
+    for row in iter_catalog_rows(catalog_source, "backupset", ("id", "timestamp")):
+        backupset_id = _as_int(row.get("id"))
+        timestamp_dt = _as_datetime(row.get("timestamp"))
+        if backupset_id is not None and timestamp_dt is not None:
+            times[backupset_id] = timestamp_dt
+    return times
+
+
+def version_time(row, backupset_times):
+    """When File History captured the version in a file row: tCaptured's backupset, else tQueued's"""
+    for name in BACKUPSET_COLUMNS:
+        timestamp_dt = backupset_times.get(_as_int(row.get(name)))
+        if timestamp_dt is not None:
+            return timestamp_dt
+    return None
+
+
+def versioned_name(name, timestamp_dt):
+    """The name File History gives a version in Data: 'report (2021_01_01 10_00_00 UTC).docx'"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem} ({timestamp_dt.strftime('%Y_%m_%d %H_%M_%S')} UTC){ext}"
+
+
+def load_catalog_names(catalog_source):
+    """
+    The string table ({id: text}) and namespace table ({id: (parentId, childId)})
+    that file rows are joined against. Folder paths are resolved by walking
+    namespace parents, which needs random access, so both are held in memory.
+    """
+    strings = {}
+    for row in iter_catalog_rows(catalog_source, "string", ("id",) + TEXT_COLUMNS):
+        string_id = _as_int(row.get("id"))
+        if string_id is not None:
+            strings[string_id] = _first(row, TEXT_COLUMNS)
+
+    # Only needed when file rows point at a namespace row instead of carrying nameId
+    namespace = {}
+    for row in iter_catalog_rows(catalog_source, "namespace", ("id", "parentId", "childId")):
+        namespace_id = _as_int(row.get("id"))
+        if namespace_id is not None:
+            namespace[namespace_id] = (_as_int(row.get("parentId")), _as_int(row.get("childId")))
+    return strings, namespace
+
+
+def names_size(names):
+    """Rough bytes held by the maps of load_catalog_names, to charge against a memory budget"""
+    strings, namespace = names
+    size = sys.getsizeof(strings) + sys.getsizeof(namespace)
+    size += sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in strings.items())
+    size += sum(sys.getsizeof(key) + estimate_size(value) for key, value in namespace.items())
+    return size
+
+
+def iter_catalog_versions(catalog_source, data_directory, path_filter=None, names=None):
+    """
+    Yield one version record per row of the catalog's file table, in the same
+    shape scan_directory produces. src_path is where File History would have
+    stored the version; nothing is checked on disk here. names is the result of
+    load_catalog_names, if the caller loaded it already.
+    """
+    strings, namespace = names or load_catalog_names(catalog_source)
+
+    folder_paths = {}
+
+    def folder_path(parent_id, depth=0):
+        # Same lookup order as catalog.find_path_from_namespace: the parent's string, then its namespace parent
+        if parent_id in folder_paths:
+            return folder_paths[parent_id]
+        path = strings.get(parent_id)
+        if path is None and parent_id in namespace and depth < 64:
+            path = folder_path(namespace[parent_id][0], depth + 1)
+        folder_paths[parent_id] = path
+        return path
+
+    backupset_times = load_backupset_times(catalog_source)
+    if not backupset_times:
+        print(f"[WARN] No backupset timestamps in {catalog_source}, versions cannot be dated")
+
+    columns = ("id", "parentId", "nameId", "childId", "hash") + SIZE_COLUMNS + BACKUPSET_COLUMNS
+    for row in iter_catalog_rows(catalog_source, "file", columns):
+        parent_id = _as_int(row.get("parentId"))
+        name_id = _as_int(row.get("nameId"))
+        if name_id is None:
+            parent_id, name_id = namespace.get(_as_int(row.get("childId")), (None, None))
+        folder = folder_path(parent_id)
+        name = strings.get(name_id)
+        timestamp_dt = version_time(row, backupset_times)
+        if not folder or not name or timestamp_dt is None:
+            continue
+
+        # Data mirrors the source path with the drive colon removed, as catalog.py restores $OF
+        parts = [p for p in folder.replace(":", "").replace("/", "\\").split("\\") if p]
+        if path_filter and not path_filter.matches(parts, name):
+            continue
+        src_folder = os.path.join(*parts) if parts else ""
+        current_name = versioned_name(name, timestamp_dt)
+        version = {
+            "current_name": current_name,
+            "original_name": name,
+            "src_folder": src_folder,
+            "src_path": os.path.abspath(os.path.join(data_directory, src_folder, current_name)),
+            "dst_path": os.path.join(src_folder, name),
+            "size": _as_int(_first(row, SIZE_COLUMNS)) or 0,
+            "timestamp": timestamp_dt.isoformat() + "Z",
+            "timestamp_dt": timestamp_dt,
+        }
+        if row.get("hash"):
+            # Lets lib/dedupe.py group identical versions without reading them
+            version["hash"] = "catalog:" + str(row["hash"]).replace(" ", "").lower()
+        yield version
@@ -0,0 +1,254 @@
+"""
+Columnar export of catalog tables, as an alternative to export_table_to_csv.
+
+Each table becomes a directory holding:
+    meta.json               row count and the kind of every column
+    <column>.npy            integer columns, little-endian int64 in NumPy .npy format
+    <column>.blob           text (UTF-8) or binary columns, values concatenated
+    <column>.offsets.npy    n + 1 int64 offsets into the blob
+
+Ids and FILETIMEs stay integers and hashes stay raw bytes, so nothing has to be
+re-parsed on load. The .npy files can be opened with numpy.load(mmap_mode="r"),
+but the reader here only needs the standard library.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from file_history_cleaner.lib.edb_extractor import bytes_to_int, iter_table_rows, open_table
+
+NULL_INT = -(2 ** 63)
+NPY_HEADER_SIZE = 128
+
+INT_COLUMNS = {
+    "id", "backupsetId", "parentId", "childId", "nameId", "valueId", "size",
+    "attributes", "state", "status", "fileCount", "directoryCount",
+    "totalFileSize", "totalDirectorySize",
+    "tCreated", "tModified", "tAccessed", "tExpires", "tQueued", "tCaptured",
+    "tUpdated", "tCompleted", "timestamp", "fileSize", "fileAttrib", "fileCreated",
+    "fileModified", "fileRecordId", "tVisible", "usn",
+}
+TEXT_COLUMNS = {"name", "description", "value", "string"}
+
+
+def column_kind(column_name):
+    if column_name in INT_COLUMNS:
+        return "int"
+    if column_name in TEXT_COLUMNS:
+        return "str"
+    return "bytes"
+
+
+def _to_int64(value):
+    if value is None:
+        return NULL_INT
+    value = bytes_to_int(value)
+    if not isinstance(value, int):
+        return NULL_INT
+    # Unsigned 64-bit values are stored with their two's complement bit pattern
+    if value >= 2 ** 63:
+        value -= 2 ** 64
+    return value
+
+
+def _to_blob(value, kind):
+    if value is None:
+        return b""
+    if kind == "str":
+        if isinstance(value, bytes):
+            try:
+                value = value.decode("utf-16le").rstrip("\x00")
+            except UnicodeDecodeError:
+                return value
+        return str(value).encode("utf-8")
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def record_to_values(table_name, column_names, record):
+    """Raw typed values of one record, in column order"""
+    values = []
+    for col_idx, col_name in enumerate(column_names):
+        raw_value = record.get_value_data(col_idx)
+        kind = column_kind(col_name)
+        values.append(_to_int64(raw_value) if kind == "int" else _to_blob(raw_value, kind))
+    return values
+
+
+def _npy_header(length):
+    header = "{'descr': '<i8', 'fortran_order': False, 'shape': (%d,), }" % length
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class _IntFile:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(0))
+        self.length = 0
+
+    def write(self, values):
+        data = array("q", values)
+        if sys.byteorder == "big":
+            data.byteswap()
+        data.tofile(self.file)
+        self.length += len(data)
+
+    def close(self):
+        # The shape is only known at the end; the header is padded so it fits in place
+        self.file.seek(0)
+        self.file.write(_npy_header(self.length))
+        self.file.close()
+
+
+class ColumnarWriter:
+    """Buffers rows and appends them to the column files in batches"""
+
+    def __init__(self, table_dir, table_name, column_names, batch_size=65536):
+        os.makedirs(table_dir, exist_ok=True)
+        self.table_dir = table_dir
+        self.table_name = table_name
+        self.column_names = list(column_names)
+        self.kinds = [column_kind(name) for name in self.column_names]
+        self.batch_size = batch_size
+        self.rows = 0
+        self.batch = [[] for _ in self.column_names]
+        self.int_files = {}
+        self.blob_files = {}
+        for name, kind in zip(self.column_names, self.kinds):
+            if kind == "int":
+                self.int_files[name] = _IntFile(os.path.join(table_dir, f"{name}.npy"))
+            else:
+                offsets = _IntFile(os.path.join(table_dir, f"{name}.offsets.npy"))
+                offsets.write([0])
+                blob = open(os.path.join(table_dir, f"{name}.blob"), "wb")
+                self.blob_files[name] = [blob, offsets, 0]
+
+    def append(self, values):
+        for column, value in zip(self.batch, values):
+            column.append(value)
+        self.rows += 1
+        if len(self.batch[0]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for name, kind, column in zip(self.column_names, self.kinds, self.batch):
+            if not column:
+                continue
+            if kind == "int":
+                self.int_files[name].write(column)
+            else:
+                blob_state = self.blob_files[name]
+                blob, offsets, position = blob_state
+                ends = []
+                for value in column:
+                    position += len(value)
+                    ends.append(position)
+                blob.write(b"".join(column))
+                offsets.write(ends)
+                blob_state[2] = position
+        self.batch = [[] for _ in self.column_names]
+
+    def close(self):
+        self.flush()
+        for int_file in self.int_files.values():
+            int_file.close()
+        for blob, offsets, _ in self.blob_files.values():
+            blob.close()
+            offsets.close()
+        meta = {
+            "table": self.table_name,
+            "rows": self.rows,
+            "columns": dict(zip(self.column_names, self.kinds)),
+        }
+        with open(os.path.join(self.table_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+
+def export_table_to_columnar(edb_file, table_name, output_dir, batch_size=65536):
+    """Export one table to output_dir/<table_name>/ in the columnar layout"""
+    esedb, table = open_table(edb_file, table_name)
+    if not table:
+        print(f"Table {table_name} not found.")
+        esedb.close()
+        return
+
+    try:
+        num_records = table.get_number_of_records()
+        print(f"Found {num_records} records in table {table_name}")
+    except OSError as e:
+        print(f"Error getting number of records for table {table_name}: {e}")
+        num_records = None
+
+    column_names = [
+        table.get_column(col_idx).get_name()
+        for col_idx in range(table.get_number_of_columns())
+    ]
+    writer = ColumnarWriter(
+        os.path.join(output_dir, table_name.lower()), table_name, column_names, batch_size
+    )
+    try:
+        for _, values in iter_table_rows(table, table_name, 0, num_records, convert=record_to_values):
+            if values is None:
+                break
+            writer.append(values)
+    finally:
+        writer.close()
+        esedb.close()
+    print(f"Successfully exported {writer.rows} records from table {table_name} to {writer.table_dir}")
+
+
+class ColumnarTable:
+    """Memory-mapped, read-only view of one exported table"""
+
+    def __init__(self, table_dir):
+        self.table_dir = table_dir
+        with open(os.path.join(table_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.columns = meta["columns"]
+        self._maps = []
+
+    def _map(self, file_name):
+        with open(os.path.join(self.table_dir, file_name), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        return memoryview(mm)
+
+    def _int_view(self, file_name):
+        view = self._map(file_name)
+        (header_len,) = struct.unpack("<H", view[8:10])
+        data = view[10 + header_len:]
+        if sys.byteorder == "big":
+            # No zero-copy view on big-endian hosts; fall back to a swapped copy
+            values = array("q", data.tobytes())
+            values.byteswap()
+            return memoryview(values)
+        return data.cast("q")
+
+    def ints(self, name):
+        """Zero-copy int64 view of an integer column; NULL_INT marks missing values"""
+        return self._int_view(f"{name}.npy")
+
+    def blobs(self, name):
+        """Yield each value of a text or binary column as a memoryview slice"""
+        offsets = self._int_view(f"{name}.offsets.npy")
+        blob = self._map(f"{name}.blob")
+        for i in range(len(offsets) - 1):
+            yield blob[offsets[i]:offsets[i + 1]]
+
+    def strings(self, name):
+        for value in self.blobs(name):
+            yield str(value, "utf-8", "replace")
+
+    def close(self):
+        # Raises BufferError if a view from ints() or blobs() is still alive
+        for mm in self._maps:
+            mm.close()
+        self._maps = []
@@ -0,0 +1,152 @@
+import os
+import sys
+import shutil
+import json
+from file_history_cleaner.lib.scheduler import schedule_copy_jobs
+
+
+def get_destination(file_entry, output_root):
+    """Return (dest_dir, dest_file) for a version, or None if its dst_path is empty"""
+    # Normalize dst_path
+    dst_path = file_entry["dst_path"].replace(":", "")
+    dst_parts = dst_path.replace("\\", "/").split("/")
+    dst_parts = [p for p in dst_parts if p]
+    if not dst_parts:
+        return None
+
+    dest_dir = os.path.join(output_root, *dst_parts[:-1])
+    dest_name = dst_parts[-1]
+    new_name = file_entry.get("string") or dest_name
+    return dest_dir, os.path.join(dest_dir, new_name)
+
+
+def copy_file(src_file, dest_dir, dest_file, throttle=None):
+    try:
+        os.makedirs(dest_dir, exist_ok=True)
+    except Exception as e:
+        print(f"Failed to create directory {dest_dir}: {e}")
+        sys.exit(1)
+    # Check for path length issues (Windows default MAX_PATH is 260)
+    if os.name == "nt" and (len(dest_file) > 255 or len(dest_dir) > 240):
+        print(f"Error {dest_file}: path too long")
+        sys.exit(1)
+    # Check if source file exists
+    if not os.path.exists(src_file):
+        print(f"Source file does not exist: {src_file}")
+        sys.exit(1)
+    if os.path.exists(dest_file):
+        print(f"File already exists, overwriting: {dest_file}")
+    try:
+        if throttle:
+            throttle.copy2(src_file, dest_file)
+        else:
+            shutil.copy2(src_file, dest_file)
+        # print(f"Copied {src_file} -> {dest_file}")
+    except Exception as e:
+        print(f"Failed to copy {src_file} to {dest_file}: {e}")
+        sys.exit(1)
+
+
+def store_file(src_file, dest_dir, dest_file, size, output_root, archive=None, throttle=None):
+    """Copy or archive one file; returns the plain file written, or None if archived"""
+    if archive is None:
+        copy_file(src_file, dest_dir, dest_file, throttle)
+        return dest_file
+    if not os.path.exists(src_file):
+        print(f"Source file does not exist: {src_file}")
+        sys.exit(1)
+    if throttle:
+        throttle.acquire(size, ops=1)
+    try:
+        return archive.add(src_file, os.path.relpath(dest_file, output_root), size)
+    except Exception as e:
+        print(f"Failed to archive {src_file} as {dest_file}: {e}")
+        sys.exit(1)
+
+
+def copy_and_rename_files(json_data, output_root, dry_run=True, concurrency=None, fs=None, verifier=None, schedule=False, archive=None, throttle=None):
+    logs = []
+    pending = []
+    files_copied = 0
+    copied_size = 0
+    files_skipped = 0
+    skipped_size = 0
+    if not os.path.exists(output_root):
+        print(f"Output directory does not exist: {output_root}. Creating it now...")
+        if not dry_run:
+            try:
+                os.makedirs(output_root)
+            except Exception as e:
+                print(f"Failed to create output directory {output_root}: {e}")
+                sys.exit(1)
+
+    for base_id, file_group in json_data["files"].items():
+        for version_key, file_entry in file_group["versions"].items():
+            src_file = file_entry["src_path"]
+
+            to_delete = file_entry.get("to_delete", False)
+            if to_delete:
+                print(f"[SKIP] Marked for deletion: {src_file}")
+                files_skipped += 1
+                skipped_size += file_entry["size"]
+                continue
+
+            destination = get_destination(file_entry, output_root)
+            if destination is None:
+                print(f"Error: Invalid dst_path: {file_entry['dst_path']}")
+                sys.exit(1)
+            dest_dir, dest_file = destination
+
+            if dry_run:
+                print(f"[DRY RUN] Would copy: {src_file} → {dest_file}")
+                files_copied += 1
+                copied_size += file_entry["size"]
+                continue
+
+            if concurrency or schedule:
+                # Check path length up front, the copy itself happens after the loop
+                if os.name == "nt" and (len(dest_file) > 255 or len(dest_dir) > 240):
+                    print(f"Error {dest_file}: path too long")
+                    sys.exit(1)
+                pending.append((src_file, dest_dir, dest_file, file_entry["size"]))
+                continue
+
+            written = store_file(src_file, dest_dir, dest_file, file_entry["size"], output_root, archive, throttle)
+            files_copied += 1
+            copied_size += file_entry["size"]
+            if verifier and written:
+                verifier.submit(src_file, written)
+
+    if schedule:
+        # Follow the source disk layout instead of the plan's base64-keyed order
+        pending = schedule_copy_jobs(pending)
+
+    # Archives are written one member at a time, so archive mode never runs concurrently
+    if pending and (not concurrency or archive):
+        for src_file, dest_dir, dest_file, size in pending:
+            written = store_file(src_file, dest_dir, dest_file, size, output_root, archive, throttle)
+            files_copied += 1
+            copied_size += size
+            if verifier and written:
+                verifier.submit(src_file, written)
+    elif pending:
+        from file_history_cleaner.lib.async_io import copy_files_concurrently
+
+        done_sizes = []
+
+        def on_done(job, error):
+            if error is None:
+                done_sizes.append(job[3])
+                if verifier:
+                    verifier.submit(job[0], job[2])
+
+        copied, errors = copy_files_concurrently(
+            pending, concurrency, fs, on_done=on_done, stop_on_error=True, throttle=throttle
+        )
+        files_copied += copied
+        copied_size += sum(done_sizes)
+        for (src_file, _, dest_file, _), e in errors:
+            print(f"Failed to copy {src_file} to {dest_file}: {e}")
+            sys.exit(1)
+
+    return files_copied, copied_size, files_skipped, skipped_size
@@ -0,0 +1,139 @@
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from file_history_cleaner.lib.verify import hash_file
+
+EDGE_SIZE = 64 * 1024
+
+
+def partial_hash(path, edge_size=EDGE_SIZE):
+    """
+    BLAKE2b of the first and last edge_size bytes. Files no bigger than both
+    edges together are hashed whole, so for them this equals hash_file.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= 2 * edge_size:
+            return True, hashlib.blake2b(f.read()).hexdigest()
+        digest = hashlib.blake2b()
+        digest.update(f.read(edge_size))
+        f.seek(size - edge_size)
+        digest.update(f.read(edge_size))
+    return False, digest.hexdigest()
+
+
+def _safe(function, path):
+    try:
+        return function(path)
+    except OSError:
+        return None
+
+
+def _partial(path):
+    return _safe(partial_hash, path)
+
+
+def _full(path):
+    return _safe(hash_file, path)
+
+
+def _collapse_batch(executor, buckets):
+    bytes_read = 0
+
+    # Stage 1: head and tail of same-size versions that have no hash yet
+    to_partial = [
+        (versions, key)
+        for versions, keys in buckets
+        if not all(versions[k].get("hash") for k in keys)
+        for key in keys
+        if not versions[key].get("hash", "").startswith("blake2b:")
+    ]
+    partials = {}
+    paths = [versions[key]["src_path"] for versions, key in to_partial]
+    for (versions, key), result in zip(to_partial, executor.map(_partial, paths, chunksize=32)):
+        if result is None:
+            continue
+        whole, digest = result
+        bytes_read += min(versions[key]["size"], 2 * EDGE_SIZE)
+        if whole:
+            versions[key]["hash"] = "blake2b:" + digest
+        else:
+            partials[id(versions), key] = digest
+
+    # Stage 2: full hashes, only where size and both edges collide
+    to_full = []
+    for versions, keys in buckets:
+        by_partial = defaultdict(list)
+        for key in keys:
+            digest = partials.get((id(versions), key))
+            if digest is not None:
+                by_partial[digest].append(key)
+        for same in by_partial.values():
+            if len(same) > 1:
+                to_full.extend((versions, key) for key in same)
+    paths = [versions[key]["src_path"] for versions, key in to_full]
+    for (versions, key), digest in zip(to_full, executor.map(_full, paths, chunksize=4)):
+        if digest is not None:
+            bytes_read += versions[key]["size"]
+            versions[key]["hash"] = "blake2b:" + digest
+
+    redundant_count = 0
+    redundant_size = 0
+    for versions, keys in buckets:
+        by_hash = defaultdict(list)
+        for key in keys:
+            # Catalog and BLAKE2b hashes carry different prefixes, so they never match each other
+            digest = versions[key].get("hash")
+            if digest:
+                by_hash[digest].append(key)
+        for same in by_hash.values():
+            if len(same) < 2:
+                continue
+            kept = [key for key in same if not versions[key].get("to_delete")]
+            original = kept[0] if kept else max(same, key=lambda k: versions[k]["timestamp"] or "")
+            for key in same:
+                if key != original:
+                    versions[key]["identical_to"] = original
+                    redundant_count += 1
+                    redundant_size += versions[key]["size"]
+    return redundant_count, redundant_size, bytes_read
+
+
+def find_identical_versions(json_data, workers=None, batch_size=10000):
+    """
+    Find byte-identical versions within each file group of a plan: versions are
+    bucketed by size, same-size versions by a hash of their first and last
+    64 KB, and only versions that still collide are hashed in full, in a
+    process pool. A version that already has a "hash" (from the catalog's file
+    table, or from an earlier run on a saved plan) is not read again.
+
+    Every redundant version gets "identical_to" naming the version it repeats,
+    the kept one where possible. Groups are handled batch_size buckets at a
+    time, so streamed plans are not pulled into memory (their annotations are
+    not written back, only the totals). Returns (redundant versions, redundant
+    bytes, bytes read).
+    """
+    totals = [0, 0, 0]
+    buckets = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_data in json_data["files"].values():
+            versions = file_data["versions"]
+            if len(versions) < 2:
+                continue
+            by_size = defaultdict(list)
+            for key, version in versions.items():
+                version.pop("identical_to", None)
+                by_size[version["size"]].append(key)
+            buckets.extend((versions, keys) for keys in by_size.values() if len(keys) > 1)
+            if len(buckets) >= batch_size:
+                totals = [a + b for a, b in zip(totals, _collapse_batch(executor, buckets))]
+                buckets = []
+        if buckets:
+            totals = [a + b for a, b in zip(totals, _collapse_batch(executor, buckets))]
+
+    redundant_count, redundant_size, bytes_read = totals
+    json_data["redundant_count"] = redundant_count
+    json_data["redundant_size"] = redundant_size
+    return redundant_count, redundant_size, bytes_read
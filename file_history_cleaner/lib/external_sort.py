@@ -0,0 +1,112 @@
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+
+# Open runs merged at once; more runs are first merged down in passes
+MAX_MERGE_FANIN = 64
+RUN_READ_BUFFER = 64 * 1024
+
+
+def estimate_size(item):
+    """Rough bytes held by a tuple of scalars, plus its slot in the buffer list"""
+    return sys.getsizeof(item) + sum(sys.getsizeof(value) for value in item) + 8
+
+
+def _write_run(items, tmp_dir):
+    fd, path = tempfile.mkstemp(prefix="run-", suffix=".bin", dir=tmp_dir)
+    with os.fdopen(fd, "wb") as f:
+        # One pickle per item: a shared Pickler/Unpickler memo would keep the whole run alive
+        for item in items:
+            pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path):
+    with open(path, "rb", buffering=RUN_READ_BUFFER) as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class ExternalSorter:
+    """
+    Sorts more items than fit in memory. Items are buffered until their
+    estimated size passes memory_budget, then the buffer is sorted and spilled
+    to a run file in tmp_dir. Iterating merges the runs with heapq.merge,
+    holding one item per run.
+
+        sorter = ExternalSorter(256 * 1024 ** 2)
+        for item in items:
+            sorter.add(item)
+        for item in sorter:
+            ...
+        sorter.close()
+    """
+
+    def __init__(self, memory_budget, key=None, tmp_dir=None):
+        self.memory_budget = memory_budget
+        self.key = key
+        self.tmp_dir = tempfile.mkdtemp(prefix="fhc-sort-", dir=tmp_dir)
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.runs = []
+        self.count = 0
+        self.spilled = 0
+
+    def add(self, item):
+        self.buffer.append(item)
+        self.buffer_bytes += estimate_size(item)
+        self.count += 1
+        if self.buffer_bytes >= self.memory_budget:
+            self._spill()
+
+    def _spill(self):
+        self.buffer.sort(key=self.key)
+        self.runs.append(_write_run(self.buffer, self.tmp_dir))
+        self.spilled += len(self.buffer)
+        self.buffer = []
+        self.buffer_bytes = 0
+
+    def _merge(self, paths):
+        return heapq.merge(*(_read_run(path) for path in paths), key=self.key)
+
+    def __iter__(self):
+        if not self.runs:
+            self.buffer.sort(key=self.key)
+            yield from self.buffer
+            return
+        if self.buffer:
+            self._spill()
+        # Keep the number of open run files (and their read buffers) bounded
+        while len(self.runs) > MAX_MERGE_FANIN:
+            merged = []
+            for i in range(0, len(self.runs), MAX_MERGE_FANIN):
+                group = self.runs[i:i + MAX_MERGE_FANIN]
+                merged.append(_write_run(self._merge(group), self.tmp_dir))
+                for path in group:
+                    os.remove(path)
+            self.runs = merged
+        yield from self._merge(self.runs)
+
+    def close(self):
+        self.buffer = []
+        for path in self.runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.runs = []
+        try:
+            os.rmdir(self.tmp_dir)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,114 @@
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+READ_BUFFER_SIZE = 16 * 1024 * 1024
+
+
+def read_header(csv_path):
+    """Return the column names and the byte offset where the data rows start"""
+    with open(csv_path, mode="rb") as file:
+        header_line = file.readline()
+        data_offset = file.tell()
+    header = next(csv.reader([header_line.decode("utf-8-sig")]))
+    return header, data_offset
+
+
+def _column_getter(header, columns):
+    if columns is None:
+        return tuple
+    indices = [header.index(name) for name in columns]
+    getter = itemgetter(*indices)
+    if len(indices) == 1:
+        return lambda row: (getter(row),)
+    return getter
+
+
+def _count_quotes(mm, start, end):
+    count = 0
+    for pos in range(start, end, READ_BUFFER_SIZE):
+        count += mm[pos:min(pos + READ_BUFFER_SIZE, end)].count(b'"')
+    return count
+
+
+def split_line_ranges(csv_path, start, parts):
+    """
+    Split [start, EOF) into up to `parts` byte ranges that each begin at a row
+    boundary: a newline preceded by an even number of quote characters, so a
+    newline inside a quoted field never splits its row ("" escapes count twice).
+    """
+    size = os.path.getsize(csv_path)
+    if size <= start:
+        return []
+    bounds = [start]
+    with open(csv_path, mode="rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            step = (size - start) // parts
+            for i in range(1, parts):
+                # Quotes are counted from the last boundary, where no field is open
+                pos = bounds[-1]
+                quotes = 0
+                newline = mm.find(b"\n", max(start + i * step, pos))
+                while newline != -1:
+                    quotes += _count_quotes(mm, pos, newline)
+                    if quotes % 2 == 0:
+                        break
+                    pos = newline
+                    newline = mm.find(b"\n", newline + 1)
+                if newline == -1:
+                    break
+                if newline + 1 > bounds[-1]:
+                    bounds.append(newline + 1)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_range(csv_path, start, end, columns):
+    header, _ = read_header(csv_path)
+    getter = _column_getter(header, columns)
+    with open(csv_path, mode="rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode("utf-8")
+    rows = [getter(row) for row in csv.reader(io.StringIO(text, newline="")) if row]
+    if columns is None:
+        return rows
+    # Column lists pickle back to the parent much faster than a tuple per row
+    return list(zip(*rows))
+
+
+def iter_columns(csv_path, columns=None, workers=1):
+    """
+    Yield a tuple per row holding only `columns` (all columns when None), using
+    positional access instead of a dict per row. With workers > 1 the file is
+    split on line boundaries and the ranges are parsed in separate processes;
+    rows are still yielded in file order.
+    """
+    header, data_offset = read_header(csv_path)
+    getter = _column_getter(header, columns)
+
+    if workers and workers > 1:
+        ranges = split_line_ranges(csv_path, data_offset, workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_parse_range, csv_path, start, end, columns)
+                for start, end in ranges
+            ]
+            for future in futures:
+                if columns is None:
+                    yield from future.result()
+                else:
+                    yield from zip(*future.result())
+        return
+
+    with open(
+        csv_path, mode="r", encoding="utf-8-sig", newline="", buffering=READ_BUFFER_SIZE
+    ) as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        for row in reader:
+            if row:
+                yield getter(row)
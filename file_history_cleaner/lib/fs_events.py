@@ -0,0 +1,219 @@
+"""
+Filesystem change notifications for watch mode.
+
+read_events() returns (kind, path, is_dir) tuples with kind "added", "removed"
+or "rescan" (events were lost and the caller should rescan). Files are only
+reported as added once they are completely written.
+
+InotifyWatcher uses Linux inotify through ctypes, one watch per directory.
+PollingWatcher works anywhere: it stats each known directory per interval and
+only lists the ones whose mtime changed.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    def __init__(self, root, should_watch=None):
+        self.libc = _load_libc()
+        if self.libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.root = root
+        self.should_watch = should_watch or (lambda path: True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # watch descriptor -> directory
+        self._watch_tree(root)
+
+    def _add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            return False  # gone already, or not a directory
+        self.paths[wd] = path
+        return True
+
+    def _watch_tree(self, top, events=None):
+        # With events given (a directory that just appeared) the files already in
+        # it are reported, they may have been written before its watch existed
+        for root, dirs, files in os.walk(top):
+            if not self.should_watch(root) or not self._add_watch(root):
+                dirs[:] = []
+                continue
+            dirs[:] = [d for d in dirs if self.should_watch(os.path.join(root, d))]
+            if events is not None:
+                for name in files:
+                    events.append(("added", os.path.join(root, name), False))
+
+    def read_events(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        events = []
+        try:
+            data = os.read(self.fd, 1024 * 1024)
+        except BlockingIOError:
+            return []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                events.append(("rescan", self.root, True))
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if directory is None or mask & IN_DELETE_SELF:
+                continue
+            path = os.path.join(directory, name)
+            is_dir = bool(mask & IN_ISDIR)
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+                if self.should_watch(path):
+                    self._watch_tree(path, events)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(("removed", path, is_dir))
+            elif not is_dir and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                events.append(("added", path, False))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher:
+    def __init__(self, root, should_watch=None, interval=5.0):
+        self.root = root
+        self.should_watch = should_watch or (lambda path: True)
+        self.interval = interval
+        self.dirs = {}  # directory -> (mtime_ns, {name: is_dir})
+        self.unsettled = {}  # new file -> (size, mtime_ns) seen at the last poll
+        self.last_poll = 0.0
+        for root_dir, dirs, _ in os.walk(root):
+            if not self.should_watch(root_dir):
+                dirs[:] = []
+                continue
+            self._list(root_dir)
+            dirs[:] = [d for d in dirs if self.should_watch(os.path.join(root_dir, d))]
+
+    def _list(self, directory):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                names = {entry.name: entry.is_dir(follow_symlinks=False) for entry in entries}
+        except OSError:
+            return None
+        self.dirs[directory] = (mtime, names)
+        return names
+
+    def _poll(self):
+        events = []
+        for directory, (mtime, old_names) in list(self.dirs.items()):
+            try:
+                if os.stat(directory).st_mtime_ns == mtime:
+                    continue
+            except OSError:
+                # Gone; its parent's listing reports the removal
+                self.dirs.pop(directory, None)
+                continue
+            names = self._list(directory)
+            if names is None:
+                continue
+            for name in old_names.keys() - names.keys():
+                path = os.path.join(directory, name)
+                self.unsettled.pop(path, None)
+                events.append(("removed", path, old_names[name]))
+                if old_names[name]:
+                    for known in [d for d in self.dirs if d.startswith(path + os.sep)] + [path]:
+                        self.dirs.pop(known, None)
+            for name in names.keys() - old_names.keys():
+                path = os.path.join(directory, name)
+                if names[name]:
+                    if self.should_watch(path):
+                        for root_dir, dirs, files in os.walk(path):
+                            self._list(root_dir)
+                            dirs[:] = [d for d in dirs if self.should_watch(os.path.join(root_dir, d))]
+                            for file_name in files:
+                                self.unsettled[os.path.join(root_dir, file_name)] = None
+                else:
+                    self.unsettled[path] = None
+
+        # A new file is reported once its size and mtime held still for one interval
+        for path, seen in list(self.unsettled.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.unsettled[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current == seen:
+                del self.unsettled[path]
+                events.append(("added", path, False))
+            else:
+                self.unsettled[path] = current
+        return events
+
+    def read_events(self, timeout):
+        wait = self.last_poll + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if wait > timeout:
+                return []
+        self.last_poll = time.monotonic()
+        return self._poll()
+
+    def close(self):
+        self.dirs = {}
+        self.unsettled = {}
+
+
+def open_watcher(root, should_watch=None, interval=5.0, polling=False):
+    """inotify where it is available, otherwise (or with polling=True) a PollingWatcher"""
+    if not polling:
+        try:
+            return InotifyWatcher(root, should_watch)
+        except OSError as e:
+            print(f"[WARN] inotify unavailable ({e}), polling every {interval}s instead")
+    return PollingWatcher(root, should_watch, interval)
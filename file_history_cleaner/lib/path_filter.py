@@ -0,0 +1,149 @@
+import fnmatch
+
+GLOB_CHARS = set("*?[")
+
+
+def split_rule(rule):
+    """
+    Split a rule into lower-cased path components. Rules are relative to the
+    restored tree (the Data directory), so "C:\\Users\\Jake" and "C/Users/Jake"
+    name the same folder.
+    """
+    rule = rule.replace(":", "").replace("\\", "/")
+    return [part.lower() for part in rule.split("/") if part and part != "."]
+
+
+class _Node:
+    __slots__ = ("children", "globs", "anydepth", "loops", "terminal")
+
+    def __init__(self, loops=False):
+        self.children = {}  # literal component -> node
+        self.globs = []  # (pattern, node)
+        self.anydepth = None  # node reached through "**"
+        self.loops = loops  # a "**" node, which swallows any number of components
+        self.terminal = False  # a rule ends here; everything below matches
+
+
+def _compile(rules):
+    root = _Node()
+    for rule in rules:
+        node = root
+        for part in split_rule(rule):
+            if part == "**":
+                if node.anydepth is None:
+                    node.anydepth = _Node(loops=True)
+                node = node.anydepth
+            elif GLOB_CHARS.intersection(part):
+                for pattern, child in node.globs:
+                    if pattern == part:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.globs.append((part, child))
+                    node = child
+            else:
+                node = node.children.setdefault(part, _Node())
+        node.terminal = True
+    return root
+
+
+def _closure(nodes):
+    # "**" also matches zero components, so its node is live wherever its parent is
+    result = set()
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if node in result:
+            continue
+        result.add(node)
+        if node.anydepth is not None:
+            stack.append(node.anydepth)
+    return frozenset(result)
+
+
+def _step(nodes, name):
+    next_nodes = []
+    for node in nodes:
+        child = node.children.get(name)
+        if child is not None:
+            next_nodes.append(child)
+        for pattern, child in node.globs:
+            if fnmatch.fnmatchcase(name, pattern):
+                next_nodes.append(child)
+        if node.loops:
+            # "**" swallows this component and stays live
+            next_nodes.append(node)
+    return _closure(next_nodes)
+
+
+class PathFilter:
+    """
+    Include/exclude rules (path prefixes, with * ? [] globs per component and
+    ** for any number of folders) compiled into two tries. A walk carries one
+    state per directory and steps it with each child name, so an excluded or
+    not-included subtree is rejected before it is listed.
+
+    With no include rules everything is included. Exclude rules win.
+    """
+
+    def __init__(self, include=(), exclude=()):
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self._include_root = _compile(self.include) if self.include else None
+        self._exclude_root = _compile(self.exclude)
+        self._dir_states = {}
+
+    def __bool__(self):
+        return bool(self.include or self.exclude)
+
+    def root_state(self):
+        """State of the tree root: (include nodes, inside an include, exclude nodes)"""
+        include_nodes = _closure([self._include_root]) if self._include_root else frozenset()
+        return include_nodes, self._include_root is None, _closure([self._exclude_root])
+
+    def step(self, state, name):
+        """
+        State after descending into name, or None if that path is filtered out
+        along with everything below it.
+        """
+        include_nodes, included, exclude_nodes = state
+        name = name.lower()
+        exclude_nodes = _step(exclude_nodes, name)
+        if any(node.terminal for node in exclude_nodes):
+            return None
+        if not included:
+            include_nodes = _step(include_nodes, name)
+            if not include_nodes:
+                return None
+            included = any(node.terminal for node in include_nodes)
+            if included:
+                include_nodes = frozenset()
+        return include_nodes, included, exclude_nodes
+
+    def accepts_dir(self, state, name):
+        """Whether a walk should descend into name"""
+        return self.step(state, name) is not None
+
+    def accepts_file(self, state, name):
+        """Whether file name, inside the directory with this state, is selected"""
+        state = self.step(state, name)
+        return state is not None and state[1]
+
+    def dir_state(self, parts):
+        """State for a directory given as path components, cached per directory"""
+        key = tuple(parts)
+        if key in self._dir_states:
+            return self._dir_states[key]
+        if not key:
+            state = self.root_state()
+        else:
+            parent = self.dir_state(key[:-1])
+            state = None if parent is None else self.step(parent, key[-1])
+        self._dir_states[key] = state
+        return state
+
+    def matches(self, parts, name):
+        """Whether file name in the directory with components parts is selected"""
+        state = self.dir_state(parts)
+        return state is not None and self.accepts_file(state, name)
@@ -0,0 +1,46 @@
+import os
+
+SMALL_FILE_THRESHOLD = 1024 * 1024
+
+
+def _directory_inodes(directory):
+    # One directory listing gives the inode of every entry; no per-file stat on POSIX
+    inodes = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    inodes[entry.name] = entry.inode()
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return inodes
+
+
+def schedule_copy_jobs(jobs, small_file_threshold=SMALL_FILE_THRESHOLD):
+    """
+    Reorder (src_file, dest_dir, dest_file, size) jobs to follow the likely on-disk
+    layout of the source. Jobs are grouped by source directory and directories
+    are visited in order of their lowest inode. Within a directory, the small
+    files go first as one batch in inode order, followed by the large files,
+    which are streamed one after another.
+    """
+    by_directory = {}
+    for job in jobs:
+        by_directory.setdefault(os.path.dirname(job[0]), []).append(job)
+
+    batches = []
+    for directory, dir_jobs in by_directory.items():
+        inodes = _directory_inodes(directory)
+
+        def inode_of(job):
+            return inodes.get(os.path.basename(job[0]), 0)
+
+        small = sorted((j for j in dir_jobs if j[3] < small_file_threshold), key=inode_of)
+        large = sorted((j for j in dir_jobs if j[3] >= small_file_threshold), key=inode_of)
+        first_inode = min(inode_of(j) for j in dir_jobs)
+        batches.append((first_inode, directory, small + large))
+
+    batches.sort(key=lambda batch: (batch[0], batch[1]))
+    return [job for _, _, dir_jobs in batches for job in dir_jobs]
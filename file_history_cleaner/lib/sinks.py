@@ -0,0 +1,64 @@
+import json
+from collections import Counter
+
+
+class RecordSink:
+    """
+    Writes records to a JSON-lines file as they happen instead of collecting them
+    in a list. Only the per-kind counters are kept in memory.
+    """
+
+    def __init__(self, path, flush_every=100):
+        self.path = path
+        self.flush_every = flush_every
+        self.counts = Counter()
+        self.total = 0
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, record, kind=None):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.counts[kind or record.get("reason", "unknown")] += 1
+        self.total += 1
+        if self.total % self.flush_every == 0:
+            self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StreamedFiles:
+    """
+    Read-only stand-in for a plan's json_data["files"] that lives in a JSON-lines
+    file of {"id": base_id, "versions": {...}} records. items() and values() read
+    the file again on every call, so only one file's versions are in memory.
+    """
+
+    def __init__(self, path, count):
+        self.path = path
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def items(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["id"], {"versions": record["versions"]}
+
+    def values(self):
+        for _, file_data in self.items():
+            yield file_data
+
+    def keys(self):
+        for base_id, _ in self.items():
+            yield base_id
+
+    __iter__ = keys
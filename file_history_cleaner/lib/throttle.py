@@ -0,0 +1,184 @@
+"""
+Token-bucket limits on bytes/s and operations/s, shared by every copy worker.
+
+The limits can be changed while a job runs by editing the control file, e.g.
+
+    bytes_per_second = 50M
+    ops_per_second = 200
+
+(0 or "none" removes a limit). The file is checked about once a second; on
+POSIX, SIGHUP re-reads it on the next copy and SIGUSR1 prints the current
+throughput.
+"""
+import os
+import shutil
+import signal
+import threading
+import time
+
+COPY_CHUNK_SIZE = 1024 * 1024
+CONTROL_CHECK_INTERVAL = 1.0
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_rate(value):
+    """'50M', '1.5G', '200' or None/'0'/'none' (no limit) to a number per second"""
+    if value is None:
+        return None
+    value = str(value).strip().upper().replace("B/S", "").replace("/S", "").rstrip("B").strip()
+    if value in ("", "0", "NONE", "OFF"):
+        return None
+    unit = value[-1] if value[-1] in UNITS else ""
+    rate = float(value[:-1] if unit else value) * UNITS[unit]
+    return rate if rate > 0 else None
+
+
+class _Bucket:
+    def __init__(self, rate, burst_seconds):
+        self.burst_seconds = burst_seconds
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        self.rate = rate
+        self.capacity = rate * self.burst_seconds if rate else 0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        """Take amount (going into debt if needed); returns the seconds to wait"""
+        if not self.rate:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class Throttle:
+    """Thread-safe limiter; one instance is shared by all workers of a job"""
+
+    def __init__(self, bytes_per_second=None, ops_per_second=None, control_file=None, burst_seconds=1.0, report_every=None):
+        self.lock = threading.Lock()
+        self.bytes = _Bucket(parse_rate(bytes_per_second), burst_seconds)
+        self.ops = _Bucket(parse_rate(ops_per_second), burst_seconds)
+        self.control_file = control_file
+        self.control_mtime = None
+        self.next_control_check = 0.0
+        self.report_every = report_every
+        self.next_report = time.monotonic() + report_every if report_every else None
+        self.started = time.monotonic()
+        self.total_bytes = 0
+        self.total_ops = 0
+        self.waited = 0.0
+        # Set by the signal handlers, acted on by the next acquire()
+        self.reload_requested = False
+        self.report_requested = False
+        if control_file:
+            self.reload()
+
+    def set_limits(self, bytes_per_second=None, ops_per_second=None):
+        with self.lock:
+            self.bytes.set_rate(parse_rate(bytes_per_second))
+            self.ops.set_rate(parse_rate(ops_per_second))
+        print(f"[INFO] Throttle limits: {self.describe_limits()}")
+
+    def describe_limits(self):
+        rate = f"{self.bytes.rate / (1024 ** 2):.1f} MB/s" if self.bytes.rate else "unlimited bytes/s"
+        ops = f"{self.ops.rate:.0f} ops/s" if self.ops.rate else "unlimited ops/s"
+        return f"{rate}, {ops}"
+
+    def reload(self, force=True):
+        """Apply the control file if it changed since it was last read"""
+        try:
+            mtime = os.stat(self.control_file).st_mtime_ns
+        except OSError:
+            return
+        if not force and mtime == self.control_mtime:
+            return
+        self.control_mtime = mtime
+        limits = {"bytes_per_second": None, "ops_per_second": None}
+        try:
+            with open(self.control_file, encoding="utf-8") as f:
+                for line in f:
+                    line = line.split("#", 1)[0]
+                    if "=" in line:
+                        key, value = (part.strip() for part in line.split("=", 1))
+                        if key in limits:
+                            limits[key] = value
+            self.set_limits(limits["bytes_per_second"], limits["ops_per_second"])
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not apply throttle control file {self.control_file}: {e}")
+
+    def install_signal_handlers(self):
+        """
+        SIGHUP re-reads the control file, SIGUSR1 prints throughput (POSIX, main
+        thread only). The handlers only raise a flag: a handler that took the lock
+        could interrupt the main thread while it holds it, and deadlock.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return  # signal.signal only works there; the control file is still polled
+        if hasattr(signal, "SIGHUP") and self.control_file:
+            signal.signal(signal.SIGHUP, lambda signum, frame: setattr(self, "reload_requested", True))
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: setattr(self, "report_requested", True))
+
+    def acquire(self, nbytes=0, ops=0):
+        """Block until nbytes and ops fit in the limits, and count them"""
+        now = time.monotonic()
+        if self.reload_requested:
+            self.reload_requested = False
+            self.reload()
+        elif self.control_file and now >= self.next_control_check:
+            self.next_control_check = now + CONTROL_CHECK_INTERVAL
+            self.reload(force=False)
+        with self.lock:
+            wait = max(self.bytes.reserve(nbytes, now), self.ops.reserve(ops, now))
+            self.total_bytes += nbytes
+            self.total_ops += ops
+            self.waited += wait
+            report = self.next_report is not None and now >= self.next_report
+            if report:
+                self.next_report = now + self.report_every
+        if report or self.report_requested:
+            self.report_requested = False
+            print(self.report())
+        if wait > 0:
+            time.sleep(wait)
+
+    def copy2(self, src, dst):
+        """shutil.copy2 that spends one operation and the file's bytes, chunk by chunk"""
+        self.acquire(ops=1)
+        if not self.bytes.rate:
+            shutil.copy2(src, dst)
+            with self.lock:
+                self.total_bytes += os.path.getsize(dst)
+            return dst
+        if os.path.isdir(dst):
+            dst = os.path.join(dst, os.path.basename(src))
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            for chunk in iter(lambda: fsrc.read(COPY_CHUNK_SIZE), b""):
+                self.acquire(len(chunk))
+                fdst.write(chunk)
+        shutil.copystat(src, dst)
+        return dst
+
+    def remove(self, path):
+        self.acquire(ops=1)
+        os.remove(path)
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"Throughput: {self.total_bytes / (1024 ** 2) / elapsed:.1f} MB/s, {self.total_ops / elapsed:.1f} ops/s "
+            f"({self.total_bytes / (1024 ** 2):.1f} MB, {self.total_ops} ops in {elapsed:.0f}s, "
+            f"{self.waited:.0f}s throttled; limits {self.describe_limits()})"
+        )
+
+
+def open_throttle(max_rate=None, max_ops=None, control_file=None, report_every=60):
+    """A Throttle with signal handlers installed, or None when nothing is limited"""
+    if not (max_rate or max_ops or control_file):
+        return None
+    throttle = Throttle(max_rate, max_ops, control_file, report_every=report_every)
+    throttle.install_signal_handlers()
+    return throttle
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import mmap
+import os
+import tarfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from file_history_cleaner.lib.copy_and_rename_files import get_destination
+
+HASH_BUFFER_SIZE = 8 * 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+def hash_file(path):
+    """BLAKE2b of a file, mmap'd when large and read in big chunks otherwise"""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for offset in range(0, size, HASH_BUFFER_SIZE):
+                        digest.update(view[offset:offset + HASH_BUFFER_SIZE])
+                finally:
+                    view.release()
+        else:
+            return hash_stream(f)
+    return digest.hexdigest()
+
+
+def hash_stream(f):
+    """BLAKE2b of an open binary stream, e.g. an archive member"""
+    digest = hashlib.blake2b()
+    for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_pair(src, dest, mode="hash"):
+    """Return None when dest matches src, otherwise the reason it does not"""
+    try:
+        src_size = os.stat(src).st_size
+    except OSError as e:
+        return f"source unreadable: {e}"
+    try:
+        dest_size = os.stat(dest).st_size
+    except OSError as e:
+        return f"destination missing: {e}"
+    if src_size != dest_size:
+        return f"size mismatch ({src_size} != {dest_size})"
+    if mode == "size":
+        return None
+    try:
+        if hash_file(src) != hash_file(dest):
+            return "content mismatch"
+    except OSError as e:
+        return f"read error: {e}"
+    return None
+
+
+def _check_member(src, open_member, member_size, mode):
+    try:
+        src_size = os.stat(src).st_size
+    except OSError as e:
+        return f"source unreadable: {e}"
+    if src_size != member_size:
+        return f"size mismatch ({src_size} != {member_size})"
+    if mode == "size":
+        return None
+    try:
+        with open_member() as member:
+            if hash_file(src) != hash_stream(member):
+                return "content mismatch"
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        # zipfile also checks the stored CRC while the member is read
+        return f"read error: {e}"
+    return None
+
+
+def verify_archive_members(archive_path, members, mode="hash"):
+    """
+    Check the (src, arcname) members written to one tar or zip shard, in the
+    order they were added, so a compressed tar is read once from start to end.
+    Returns one reason per member, None where the member matches its source.
+    """
+    reasons = []
+    try:
+        if archive_path.endswith(".zip"):
+            with zipfile.ZipFile(archive_path) as archive:
+                infos = archive.infolist()
+                for (src, arcname), info in zip(members, infos):
+                    if info.filename != arcname:
+                        reasons.append(f"member missing ({info.filename} found)")
+                        continue
+                    reasons.append(_check_member(src, lambda: archive.open(info), info.file_size, mode))
+        else:
+            with tarfile.open(archive_path, "r:*") as archive:
+                for (src, arcname), info in zip(members, archive):
+                    if info.name != arcname:
+                        reasons.append(f"member missing ({info.name} found)")
+                        continue
+                    reasons.append(_check_member(src, lambda: archive.extractfile(info), info.size, mode))
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        return [f"archive unreadable: {e}"] * len(members)
+    return reasons + ["member missing"] * (len(members) - len(reasons))
+
+
+class Verifier:
+    """
+    Checks copied (src, dest) pairs, and archive shards once they are closed, in
+    a process pool while copying carries on. Mismatches are appended to
+    report_path as JSON lines as soon as they are found.
+    """
+
+    def __init__(self, mode="hash", workers=None, report_path="verify_report.jsonl"):
+        if mode not in ("hash", "size"):
+            raise ValueError(f"Unknown verify mode: {mode}")
+        self.mode = mode
+        self.report_path = report_path
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.max_pending = (workers or os.cpu_count() or 1) * 64
+        self.pending = {}
+        self.checked = 0
+        self.mismatches = 0
+        self.report = open(report_path, "w", encoding="utf-8")
+
+    def submit(self, src, dest):
+        if len(self.pending) >= self.max_pending:
+            done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        future = self.executor.submit(verify_pair, src, dest, self.mode)
+        self.pending[future] = [(src, dest)]
+
+    def submit_archive(self, archive_path, members):
+        """Check every (src, arcname) member of a finished archive shard"""
+        if len(self.pending) >= self.max_pending:
+            done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        future = self.executor.submit(verify_archive_members, archive_path, members, self.mode)
+        self.pending[future] = [(src, f"{archive_path}:{arcname}") for src, arcname in members]
+
+    def _collect(self, futures):
+        for future in futures:
+            pairs = self.pending.pop(future)
+            try:
+                reasons = future.result()
+            except Exception as e:
+                reasons = [f"verify failed: {e}"] * len(pairs)
+            if not isinstance(reasons, list):
+                reasons = [reasons]
+            for (src, dest), reason in zip(pairs, reasons):
+                self.checked += 1
+                if reason:
+                    self.mismatches += 1
+                    self.report.write(
+                        json.dumps({"src": src, "dest": dest, "reason": reason}) + "\n"
+                    )
+            self.report.flush()
+
+    def close(self):
+        """Wait for outstanding checks and return (checked, mismatches)"""
+        self._collect(list(self.pending))
+        self.executor.shutdown(wait=True)
+        self.report.close()
+        return self.checked, self.mismatches
+
+
+def verify_plan(json_data, output_root, mode="hash", workers=None, report_path="verify_report.jsonl"):
+    """Verify every kept version of a main.main plan against its copy under output_root"""
+    verifier = Verifier(mode, workers, report_path)
+    for file_group in json_data["files"].values():
+        for file_entry in file_group["versions"].values():
+            if file_entry.get("to_delete", False):
+                continue
+            destination = get_destination(file_entry, output_root)
+            if destination:
+                verifier.submit(file_entry["src_path"], destination[1])
+    return verifier.close()
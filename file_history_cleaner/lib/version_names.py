@@ -0,0 +1,95 @@
+"""
+Parsing of File History version names, "name (YYYY_MM_DD HH_MM_SS UTC).ext".
+
+Every file written by one backup run carries the same timestamp, so a
+SnapshotTable parses each distinct timestamp once and hands the same Snapshot
+to every file of that run. The snapshot also counts the run's versions and bytes.
+"""
+import calendar
+import re
+from datetime import datetime
+from functools import lru_cache
+
+VERSION_STAMP = re.compile(r"\s*\((\d{4}_\d{2}_\d{2} \d{2}_\d{2}_\d{2}) UTC\)")
+
+
+class Snapshot:
+    """One backup run's timestamp in each form a plan uses, plus its totals"""
+
+    __slots__ = ("stamp", "dt", "epoch", "iso", "key", "count", "size")
+
+    def __init__(self, stamp):
+        self.stamp = stamp
+        # "2021_03_01 10_00_00" has fixed offsets, no strptime needed
+        self.dt = datetime(
+            int(stamp[0:4]), int(stamp[5:7]), int(stamp[8:10]), int(stamp[11:13]), int(stamp[14:16]), int(stamp[17:19])
+        )
+        self.epoch = calendar.timegm(self.dt.timetuple())
+        self.iso = self.dt.isoformat() + "Z"
+        self.key = self.dt.strftime("v%Y%m%d%H%M%S")
+        self.count = 0
+        self.size = 0
+
+
+class SnapshotTable:
+    def __init__(self):
+        self.snapshots = {}  # "YYYY_MM_DD HH_MM_SS" -> Snapshot
+        self.by_dt = {}
+
+    def parse(self, filename):
+        """(base name, Snapshot or None) from one regex search"""
+        match = VERSION_STAMP.search(filename)
+        if match is None:
+            return filename, None
+        rest = filename[match.end():]
+        if "UTC)" in rest:
+            # Further stamps are dropped from the base name too
+            rest = VERSION_STAMP.sub("", rest)
+        stamp = match.group(1)
+        snapshot = self.snapshots.get(stamp)
+        if snapshot is None:
+            snapshot = self.snapshots[stamp] = Snapshot(stamp)
+            self.by_dt[snapshot.dt] = snapshot
+        return filename[:match.start()] + rest, snapshot
+
+    def version_key(self, timestamp_dt):
+        """Plan version key of a datetime, preformatted for those handed out by parse"""
+        snapshot = self.by_dt.get(timestamp_dt)
+        return snapshot.key if snapshot is not None else version_key(timestamp_dt)
+
+    def merge(self, other):
+        for stamp, theirs in other.snapshots.items():
+            ours = self.snapshots.get(stamp)
+            if ours is None:
+                ours = self.snapshots[stamp] = Snapshot(stamp)
+                self.by_dt[ours.dt] = ours
+            ours.count += theirs.count
+            ours.size += theirs.size
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __iter__(self):
+        return iter(sorted(self.snapshots.values(), key=lambda snapshot: snapshot.epoch))
+
+
+def version_key(timestamp_dt):
+    """Plan version key ("vYYYYMMDDHHMMSS") of a datetime, "v_unknown" for an undated version"""
+    return timestamp_dt.strftime("v%Y%m%d%H%M%S") if timestamp_dt else "v_unknown"
+
+
+def add_version(versions, key, version):
+    """Store version under key, or key_1, key_2, ... if that is taken; returns the key used"""
+    unique_key = key
+    n = 1
+    while unique_key in versions:
+        unique_key = f"{key}_{n}"
+        n += 1
+    versions[unique_key] = version
+    return unique_key
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(timestamp):
+    """Aware datetime for a plan timestamp ("2021-03-01T10:00:00Z"), parsed once per snapshot"""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
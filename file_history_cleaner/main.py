@@ -0,0 +1,958 @@
+import sys
+import os
+import json
+from datetime import datetime, timezone
+import base64
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from file_history_cleaner.lib.copy_and_rename_files import copy_and_rename_files, get_destination
+from file_history_cleaner.lib.sinks import RecordSink
+from file_history_cleaner.lib.path_filter import PathFilter
+from file_history_cleaner.lib.version_names import SnapshotTable, add_version, parse_timestamp, version_key
+
+
+def encode_string(s):
+    return base64.urlsafe_b64encode(s.encode()).decode()
+
+
+def decode_string(encoded):
+    return base64.urlsafe_b64decode(encoded.encode()).decode()
+
+
+def new_json_data():
+    return {
+        "delete_count": 0,
+        "delete_size": 0,
+        "keep_count": 0,
+        "keep_size": 0,
+        "total_count": 0,
+        "total_size": 0,
+        "files": {},
+        "deleted_files": [],
+    }
+
+
+def data_directory_of(directory, has_data_directory=True):
+    """The folder holding the versioned files; a missing one is an error, not an empty plan"""
+    data_directory = os.path.join(directory, "Data") if has_data_directory else directory
+    if not os.path.isdir(data_directory):
+        raise FileNotFoundError(f"File History data directory not found: {data_directory}")
+    return data_directory
+
+
+def iter_directory_versions(directory, directories_to_skip=[], has_data_directory=True, path_filter=None, snapshots=None):
+    """
+    Walk one File History target and yield one record per version found.
+    path_filter (a lib.path_filter.PathFilter) is applied while descending, so
+    filtered-out folders are never listed. Names are parsed through snapshots
+    (a lib.version_names.SnapshotTable), which also totals each backup run.
+    """
+    data_directory = data_directory_of(directory, has_data_directory)
+
+    if path_filter is None:
+        path_filter = PathFilter()
+    if snapshots is None:
+        snapshots = SnapshotTable()
+    # Filter state of every directory the walk will still visit
+    dir_states = {data_directory: path_filter.root_state()}
+
+    for root, dirs, files in os.walk(data_directory):
+        state = dir_states.pop(root)
+        if root == data_directory and "$OF" in dirs:
+            # $OF is recovered through the catalog, see catalog.py
+            print(f"[INFO] Skipping directory: {os.path.join(root, '$OF')}")
+            dirs.remove("$OF")
+
+        kept_dirs = []
+        for d in dirs:
+            if d in directories_to_skip:
+                continue
+            child_state = path_filter.step(state, d)
+            if child_state is None:
+                continue
+            dir_states[os.path.join(root, d)] = child_state
+            kept_dirs.append(d)
+        dirs[:] = kept_dirs
+
+        if not files:
+            continue
+        # Resolved once per folder instead of once per file
+        abs_root = os.path.abspath(root)
+        folder_path = os.path.relpath(root, start=data_directory)
+        for file in files:
+            base_name, snapshot = snapshots.parse(file)
+            if path_filter and not path_filter.accepts_file(state, base_name):
+                continue
+            version = _version_entry(abs_root, folder_path, file, base_name, snapshot)
+            if snapshot is not None:
+                snapshot.count += 1
+                snapshot.size += version["size"]
+            yield version
+            print(f"[INFO] Processed file: {version['src_path']}")
+
+
+def _version_entry(abs_root, folder_path, file, base_name, snapshot):
+    file_path = os.path.join(abs_root, file)
+    file_info = os.stat(file_path)
+
+    if folder_path != "." and base_name not in ("", ".", ".."):
+        destination_path = os.path.join(folder_path, base_name)
+    else:
+        # What a relpath from the Data directory gives for these
+        destination_path = os.path.normpath(os.path.join(folder_path, base_name))
+
+    return {
+        "current_name": file,
+        "original_name": base_name,
+        "src_folder": folder_path,
+        "src_path": file_path,
+        "dst_path": destination_path,
+        "size": file_info.st_size,
+        "timestamp": snapshot.iso if snapshot else None,
+        "timestamp_dt": snapshot.dt if snapshot else None,  # store for sorting, will remove before saving
+    }
+
+
+def version_record(data_directory, root, file, snapshots=None):
+    """The version entry for file in folder root of a Data tree"""
+    base_name, snapshot = (SnapshotTable() if snapshots is None else snapshots).parse(file)
+    return _version_entry(os.path.abspath(root), os.path.relpath(root, start=data_directory), file, base_name, snapshot)
+
+
+def scan_directory(directory, directories_to_skip=[], has_data_directory=True, path_filter=None, snapshots=None):
+    """Walk one File History target and group its versions, without marking any for deletion"""
+    json_data = new_json_data()
+    if snapshots is None:
+        snapshots = SnapshotTable()
+    # A file's versions share its folder, so base ids are encoded once per folder and name
+    folder, base_ids = None, {}
+
+    for version in iter_directory_versions(directory, directories_to_skip, has_data_directory, path_filter, snapshots):
+        if version["src_folder"] != folder:
+            folder, base_ids = version["src_folder"], {}
+        base_id = base_ids.get(version["dst_path"])
+        if base_id is None:
+            base_id = base_ids[version["dst_path"]] = encode_string(version["dst_path"])
+
+        if base_id not in json_data["files"]:
+            json_data["files"][base_id] = {"versions": {}}
+
+        version_key = snapshots.version_key(version["timestamp_dt"])
+
+        json_data["files"][base_id]["versions"][version_key] = version
+
+        json_data["total_count"] += 1
+        json_data["total_size"] += version["size"]
+
+    return json_data
+
+
+def default_catalog_source(directory, has_data_directory=True):
+    return os.path.join(
+        directory if has_data_directory else os.path.dirname(os.path.abspath(directory)),
+        "Configuration",
+        "Catalog1.edb",
+    )
+
+
+def list_folder(folder, listings, max_folders=None):
+    """
+    The set of names in folder, listed once and kept in listings (an OrderedDict
+    with max_folders); the oldest listing is dropped when there are more.
+    """
+    names = listings.get(folder)
+    if names is None:
+        try:
+            names = set(os.listdir(folder))
+        except OSError:
+            names = set()
+        listings[folder] = names
+        if max_folders is not None and len(listings) > max_folders:
+            listings.popitem(last=False)
+    return names
+
+
+def keep_present_versions(versions, list_folder, snapshots=None):
+    """
+    Check a file's catalog versions against the Data folder listing, newest first,
+    and drop those newer than the newest one on disk. If none of them is there,
+    the versions are replaced with the ones the listing has for that name.
+    Returns (versions dropped, True if the listing was used).
+    """
+    newest_first = sorted(versions.items(), key=lambda item: item[1]["timestamp_dt"], reverse=True)
+    missing = 0
+    for version_key, version in newest_first:
+        folder, name = os.path.split(version["src_path"])
+        if name in list_folder(folder):
+            return missing, False
+        # Newer than anything on disk, so it can be neither kept nor deleted
+        del versions[version_key]
+        missing += 1
+
+    # None of the catalog's versions matched a name in Data, fall back to what the listing has
+    first = newest_first[0][1]
+    folder = os.path.dirname(first["src_path"])
+    base_name = os.path.basename(first["dst_path"])
+    if snapshots is None:
+        snapshots = SnapshotTable()
+    for name in list_folder(folder):
+        name_base, snapshot = snapshots.parse(name)
+        if name_base != base_name:
+            continue
+        file_path = os.path.join(folder, name)
+        version = dict(
+            first,
+            current_name=name,
+            src_path=file_path,
+            size=os.stat(file_path).st_size,
+            timestamp=snapshot.iso if snapshot else None,
+            timestamp_dt=snapshot.dt if snapshot else None,
+        )
+        # The catalog's hash is of the version it listed, not of this file
+        version.pop("hash", None)
+        add_version(versions, snapshot.key if snapshot else "v_unknown", version)
+    return missing, bool(versions)
+
+
+def scan_catalog(directory, catalog_source=None, has_data_directory=True, path_filter=None):
+    """
+    Build the same version index as scan_directory from the File History catalog
+    (Catalog1.edb, or its CSV or columnar export) instead of stat-ing every file.
+    Only the newest version of each file is checked on disk, against one listing
+    per folder (see keep_present_versions).
+    """
+    from file_history_cleaner.lib.catalog_index import iter_catalog_versions
+
+    data_directory = data_directory_of(directory, has_data_directory)
+    catalog_source = catalog_source or default_catalog_source(directory, has_data_directory)
+    print(f"[INFO] Reading versions from catalog: {catalog_source}")
+
+    json_data = new_json_data()
+    for version in iter_catalog_versions(catalog_source, data_directory, path_filter):
+        versions = json_data["files"].setdefault(encode_string(version["dst_path"]), {"versions": {}})["versions"]
+        add_version(versions, version_key(version["timestamp_dt"]), version)
+
+    listings = OrderedDict()
+    list_listed_folder = partial(list_folder, listings=listings)
+    snapshots = SnapshotTable()
+    missing_versions = 0
+    listed_files = 0
+    for base_id in list(json_data["files"]):
+        versions = json_data["files"][base_id]["versions"]
+        missing, listed = keep_present_versions(versions, list_listed_folder, snapshots)
+        missing_versions += missing
+        listed_files += listed
+        if not versions:
+            del json_data["files"][base_id]
+
+    for file_data in json_data["files"].values():
+        for version in file_data["versions"].values():
+            json_data["total_count"] += 1
+            json_data["total_size"] += version["size"]
+
+    print(
+        f"[INFO] Catalog plan: {len(json_data['files'])} files, {missing_versions} catalog versions not found in Data, "
+        f"{listed_files} files taken from folder listings, {len(listings)} folders listed"
+    )
+    return json_data
+
+
+def mark_versions(json_data, deleted_sink=None):
+    """Mark all but the most recent version of each file for deletion and total them up"""
+    for key in ("delete_count", "delete_size", "keep_count", "keep_size"):
+        json_data[key] = 0
+    json_data["deleted_files"] = []
+
+    for file_data in json_data["files"].values():
+        versions = file_data.get("versions", {})
+
+        # Step 1: Parse ISO 8601 timestamps into datetime objects
+        for version in versions.values():
+            ts = version.get("timestamp")
+            if ts:
+                version["timestamp_dt"] = parse_timestamp(ts)
+            else:
+                # Aware, like the parsed timestamps it is compared with
+                version["timestamp_dt"] = datetime.min.replace(tzinfo=timezone.utc)
+
+        # Step 2: Sort by timestamp_dt (newest first)
+        sorted_versions = sorted(
+            versions.items(), key=lambda item: item[1]["timestamp_dt"], reverse=True
+        )
+
+        file_data["versions"] = {k: v for k, v in sorted_versions}
+
+        for i, version in enumerate(file_data["versions"].values()):
+            version.pop("timestamp_dt", None)
+            # remove current_name as it's not needed in final output
+            version.pop("current_name", None)
+            # remove original_name as it's not needed in final output
+            version.pop("original_name", None)
+            if i == 0:
+                version["to_delete"] = False  # keep newest version
+                json_data["keep_count"] += 1
+                json_data["keep_size"] += version["size"]
+            else:
+                version["to_delete"] = True  # mark others to delete
+                json_data["delete_count"] += 1
+                json_data["delete_size"] += version["size"]
+                if deleted_sink:
+                    # Stream instead of holding every deleted path in memory
+                    deleted_sink.write(
+                        {"src": version["src_path"], "size": version["size"]},
+                        kind="older version",
+                    )
+                else:
+                    json_data["deleted_files"].append(version["src_path"])
+
+    return json_data
+
+
+def save_json_data(json_data, output_file="output.json"):
+    with open(output_file, "w") as f:
+        if isinstance(json_data["files"], dict):
+            json.dump(json_data, f, indent=2)
+        else:
+            # Streamed plan (see main_budgeted): same layout as json.dump, one file entry at a time
+            f.write("{")
+            for i, (key, value) in enumerate(json_data.items()):
+                f.write(("\n" if i == 0 else ",\n") + "  " + json.dumps(key) + ": ")
+                if key != "files":
+                    f.write(json.dumps(value, indent=2).replace("\n", "\n  "))
+                    continue
+                f.write("{")
+                written = 0
+                for base_id, file_data in value.items():
+                    f.write("\n" if written == 0 else ",\n")
+                    f.write("    " + json.dumps(base_id) + ": " + json.dumps(file_data, indent=2).replace("\n", "\n    "))
+                    written += 1
+                f.write("\n  }" if written else "}")
+            f.write("\n}")
+        print(f"[INFO] JSON data saved to '{output_file}'")
+
+
+def main(directory, directories_to_skip=[], save_json=True, has_data_directory=True, deleted_sink=None, path_filter=None, catalog_source=None, memory_budget=None, snapshots=None):
+    if memory_budget:
+        return main_budgeted(
+            [directory], memory_budget, directories_to_skip, save_json, has_data_directory, deleted_sink, path_filter, catalog_source,
+            snapshots=snapshots,
+        )
+    if catalog_source is not None:
+        # "" reads the target's own Configuration\Catalog1.edb
+        json_data = scan_catalog(directory, catalog_source, has_data_directory, path_filter)
+    else:
+        json_data = scan_directory(directory, directories_to_skip, has_data_directory, path_filter, snapshots)
+    mark_versions(json_data, deleted_sink)
+
+    if save_json:
+        save_json_data(json_data)
+
+    return json_data
+
+
+def get_disk_id(path):
+    # st_dev identifies the volume, which stands in for the physical disk
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return os.path.splitdrive(os.path.abspath(path))[0] or path
+
+
+def merge_scans(scans):
+    """Merge per-target scans into one version index; colliding version keys get a suffix"""
+    merged = new_json_data()
+    for scan in scans:
+        merged["total_count"] += scan["total_count"]
+        merged["total_size"] += scan["total_size"]
+        for base_id, file_data in scan["files"].items():
+            versions = merged["files"].setdefault(base_id, {"versions": {}})["versions"]
+            for key, version in file_data["versions"].items():
+                add_version(versions, key, version)
+    return merged
+
+
+def main_multi(directories, directories_to_skip=[], save_json=True, has_data_directory=True, deleted_sink=None, workers_per_disk=1, path_filter=None, catalog_source=None, snapshots=None):
+    """
+    Scan several File History targets at once, with one group of scan workers per
+    disk, then merge them so the newest version of each path wins across targets.
+    """
+    disks = {}
+    for directory in directories:
+        disks.setdefault(get_disk_id(directory), []).append(directory)
+    print(f"[INFO] Scanning {len(directories)} targets on {len(disks)} disks")
+
+    executors = [ThreadPoolExecutor(max_workers=workers_per_disk) for _ in disks]
+    try:
+        if catalog_source is not None:
+            # Each target is planned from its own catalog
+            futures = [
+                executor.submit(scan_catalog, directory, "", has_data_directory, path_filter)
+                for executor, group in zip(executors, disks.values())
+                for directory in group
+            ]
+        else:
+            # One snapshot table per scan, they run in parallel
+            tables = {directory: SnapshotTable() for directory in directories}
+            futures = [
+                executor.submit(scan_directory, directory, directories_to_skip, has_data_directory, path_filter, tables[directory])
+                for executor, group in zip(executors, disks.values())
+                for directory in group
+            ]
+        scans = [future.result() for future in futures]
+        if snapshots is not None and catalog_source is None:
+            for table in tables.values():
+                snapshots.merge(table)
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+    json_data = merge_scans(scans)
+    mark_versions(json_data, deleted_sink)
+
+    if save_json:
+        save_json_data(json_data)
+
+    return json_data
+
+
+def main_budgeted(directories, memory_budget, directories_to_skip=[], save_json=True, has_data_directory=True, deleted_sink=None, path_filter=None, catalog_source=None, plan_path="plan.jsonl", snapshots=None):
+    """
+    Plan one or more targets within memory_budget bytes. Versions are spilled as
+    (dst_path, timestamp, size, src_path, src_folder, hash) tuples to sorted runs
+    on disk, then merged in dst_path order so each file's versions arrive together
+    and are marked in one streaming pass. The marked plan goes to plan_path as
+    JSON lines; the returned json_data reads its "files" back from there.
+
+    A catalog source is the one part held in memory: its string and namespace
+    tables are needed for random-access path lookups while the file table
+    streams past, so their size is taken out of the sort buffer's share.
+    """
+    from file_history_cleaner.lib.external_sort import ExternalSorter
+    from file_history_cleaner.lib.sinks import StreamedFiles
+
+    # Half the budget for the sort buffer; the estimate undercounts allocator overhead
+    sort_budget = memory_budget // 2
+    sorter = ExternalSorter(sort_budget, tmp_dir=os.path.dirname(os.path.abspath(plan_path)))
+    for directory in directories:
+        names = None
+        if catalog_source is not None:
+            from file_history_cleaner.lib.catalog_index import iter_catalog_versions, load_catalog_names, names_size
+
+            source = catalog_source or default_catalog_source(directory, has_data_directory)
+            print(f"[INFO] Reading versions from catalog: {source}")
+            names = load_catalog_names(source)
+            names_bytes = names_size(names)
+            if names_bytes > sort_budget // 2:
+                print(
+                    f"[WARN] Catalog string and namespace tables take {names_bytes / (1024 ** 2):.0f} MB "
+                    f"of the {memory_budget / (1024 ** 2):.0f} MB budget"
+                )
+            # Never below a sixteenth of the budget, or every few versions would spill a run
+            sorter.memory_budget = max(sort_budget - names_bytes, memory_budget // 16)
+            versions = iter_catalog_versions(source, data_directory_of(directory, has_data_directory), path_filter, names)
+        else:
+            versions = iter_directory_versions(directory, directories_to_skip, has_data_directory, path_filter, snapshots)
+        for version in versions:
+            sorter.add(
+                (
+                    version["dst_path"], version["timestamp"] or "", version["size"], version["src_path"], version["src_folder"],
+                    version.get("hash") or "",
+                )
+            )
+        del names, versions
+        sorter.memory_budget = sort_budget
+    print(f"[INFO] Sorted {sorter.count} versions, {len(sorter.runs)} runs spilled to disk")
+
+    # The merge visits folders mostly in order, so a few recent listings are enough
+    list_recent_folder = partial(list_folder, listings=OrderedDict(), max_folders=256)
+
+    own_sink = deleted_sink is None
+    if own_sink:
+        # A list of every deleted path would defeat the budget
+        deleted_sink = RecordSink("deleted_files.jsonl")
+    json_data = new_json_data()
+    files_written = 0
+
+    def flush_group(dst_path, items, plan_file):
+        versions = {}
+        for _, timestamp, size, src_path, src_folder, content_hash in items:
+            timestamp_dt = datetime.fromisoformat(timestamp.rstrip("Z")) if timestamp else None
+            version = {
+                "src_folder": src_folder,
+                "src_path": src_path,
+                "dst_path": dst_path,
+                "size": size,
+                "timestamp": timestamp or None,
+                "timestamp_dt": timestamp_dt or datetime.min,
+            }
+            if content_hash:
+                version["hash"] = content_hash
+            add_version(versions, version_key(timestamp_dt), version)
+        if catalog_source is not None:
+            keep_present_versions(versions, list_recent_folder)
+            if not versions:
+                return 0
+        group = new_json_data()
+        group["files"][encode_string(dst_path)] = {"versions": versions}
+        mark_versions(group, deleted_sink)
+        for key in ("delete_count", "delete_size", "keep_count", "keep_size"):
+            json_data[key] += group[key]
+        for base_id, file_data in group["files"].items():
+            for version in file_data["versions"].values():
+                json_data["total_count"] += 1
+                json_data["total_size"] += version["size"]
+            plan_file.write(json.dumps({"id": base_id, "versions": file_data["versions"]}) + "\n")
+        return 1
+
+    try:
+        with open(plan_path, "w", encoding="utf-8") as plan_file:
+            current, items = None, []
+            for item in sorter:
+                if item[0] != current:
+                    if items:
+                        files_written += flush_group(current, items, plan_file)
+                    current, items = item[0], []
+                items.append(item)
+            if items:
+                files_written += flush_group(current, items, plan_file)
+    finally:
+        sorter.close()
+        if own_sink:
+            deleted_sink.close()
+
+    json_data["files"] = StreamedFiles(plan_path, files_written)
+    print(f"[INFO] Plan for {files_written} files written to '{plan_path}'")
+
+    if save_json:
+        save_json_data(json_data)
+
+    return json_data
+
+
+def plan(directories, directories_to_skip=[], save_json=True, has_data_directory=True, deleted_sink=None, workers_per_disk=1, path_filter=None, catalog_source=None, memory_budget=None, find_identical=False, hash_workers=None, snapshots=None):
+    """
+    Build the keep/delete plan for one target, or a merged plan for several.
+    With catalog_source set ("" for each target's own Catalog1.edb) the versions
+    come from the catalog instead of a walk of Data. With memory_budget set
+    (bytes) the plan is built out of core by main_budgeted. find_identical adds
+    the byte-identical version analysis of lib/dedupe.py. A SnapshotTable passed
+    as snapshots gets per-backup-run totals of the versions found in Data.
+    """
+    # With the analysis the plan is saved once it is annotated
+    save_now = save_json and not find_identical
+    if memory_budget:
+        json_data = main_budgeted(
+            directories, memory_budget, directories_to_skip, save_now, has_data_directory, deleted_sink, path_filter, catalog_source,
+            snapshots=snapshots,
+        )
+    elif len(directories) > 1:
+        json_data = main_multi(
+            directories, directories_to_skip, save_now, has_data_directory, deleted_sink, workers_per_disk, path_filter, catalog_source,
+            snapshots,
+        )
+    else:
+        json_data = main(
+            directories[0], directories_to_skip, save_now, has_data_directory, deleted_sink, path_filter, catalog_source,
+            snapshots=snapshots,
+        )
+
+    if find_identical:
+        from file_history_cleaner.lib.dedupe import find_identical_versions
+
+        _, _, bytes_read = find_identical_versions(json_data, hash_workers)
+        print(f"[INFO] Identical version check read {bytes_read / (1024 ** 2):.1f} MB")
+        if save_json:
+            save_json_data(json_data)
+    return json_data
+
+
+def print_plan_totals(folder_info):
+    print(
+        f"Total files processed: {folder_info['total_count']} (Total size: {folder_info['total_size'] / (1024 ** 3):.2f} GB)"
+    )
+    print(
+        f"Files to keep: {folder_info['keep_count']} (Total size: {folder_info['keep_size'] / (1024 ** 3):.2f} GB)"
+    )
+    print(
+        f"Files to delete: {folder_info['delete_count']} (Total size: {folder_info['delete_size'] / (1024 ** 3):.2f} GB)"
+    )
+    if "redundant_count" in folder_info:
+        print(
+            f"Identical to another version: {folder_info['redundant_count']} (Total size: {folder_info['redundant_size'] / (1024 ** 3):.2f} GB)"
+        )
+
+
+def print_snapshot_totals(snapshots):
+    for snapshot in snapshots:
+        print(
+            f"Snapshot {snapshot.dt:%Y-%m-%d %H:%M:%S} UTC: {snapshot.count} versions (Total size: {snapshot.size / (1024 ** 3):.2f} GB)"
+        )
+
+
+def restore(folder_info, output_directory, dry_run=False, concurrency=None, verify=None, schedule=False, archive_format=None, archive_large_files=None, throttle=None):
+    """
+    Copy the kept versions of a plan into output_directory and print a summary.
+    A lib.throttle.Throttle caps bytes/s and files/s across all copy workers.
+    """
+    # Process pools and archive modules are only loaded by the commands that copy
+    from file_history_cleaner.lib.archive_writer import ArchiveWriter
+    from file_history_cleaner.lib.verify import Verifier
+
+    verifier = Verifier(verify) if verify and not dry_run else None
+    archive = (
+        ArchiveWriter(output_directory, archive_format, large_file_threshold=archive_large_files, verifier=verifier)
+        if archive_format and not dry_run
+        else None
+    )
+
+    files_copied, copied_size, files_skipped, skipped_size = copy_and_rename_files(
+        folder_info, output_directory, dry_run, concurrency, verifier=verifier, schedule=schedule, archive=archive, throttle=throttle
+    )
+    if archive:
+        files_archived, archived_size, shards = archive.close()
+        print(
+            f"Files archived: {files_archived} (Total size: {archived_size / (1024 ** 3):.2f} GB, {shards} archives)"
+        )
+
+    print_plan_totals(folder_info)
+
+    print(
+        f"Files copied: {files_copied} (Total size: {copied_size / (1024 ** 3):.2f} GB)"
+    )
+    print(
+        f"Files skipped: {files_skipped} (Total size: {skipped_size / (1024 ** 3):.2f} GB)"
+    )
+    if throttle:
+        print(throttle.report())
+
+    if verifier:
+        files_checked, mismatches = verifier.close()
+        print(
+            f"Files verified: {files_checked} (Mismatches: {mismatches}, see '{verifier.report_path}')"
+        )
+
+    return files_copied, copied_size, files_skipped, skipped_size
+
+
+def _sync_copy(version, output_directory, dry_run=False, throttle=None, skip_unchanged=False):
+    """
+    Copy a kept version over its restored copy. With skip_unchanged, a copy with
+    the same size and mtime left by an earlier run is taken to be this version.
+    """
+    destination = get_destination(version, output_directory)
+    if destination is None:
+        return 0
+    dest_dir, dest_file = destination
+    try:
+        src_info = os.stat(version["src_path"])
+        if skip_unchanged:
+            try:
+                dest_info = os.stat(dest_file)
+                if dest_info.st_size == src_info.st_size and dest_info.st_mtime_ns == src_info.st_mtime_ns:
+                    return 0
+            except FileNotFoundError:
+                pass
+        if dry_run:
+            print(f"[DRY RUN] Would copy: {version['src_path']} → {dest_file}")
+            return 0
+        os.makedirs(dest_dir, exist_ok=True)
+        if throttle:
+            throttle.copy2(version["src_path"], dest_file)
+        else:
+            shutil.copy2(version["src_path"], dest_file)
+    except OSError as e:
+        # A long-running watch reports the failure and carries on
+        print(f"[ERROR] Failed to copy {version['src_path']} to {dest_file}: {e}")
+        return 0
+    print(f"[COPY] {version['src_path']} → {dest_file}")
+    return src_info.st_size
+
+
+def _group_totals(versions):
+    keep = [v for v in versions.values() if not v.get("to_delete")]
+    delete = [v for v in versions.values() if v.get("to_delete")]
+    return len(keep), sum(v["size"] for v in keep), len(delete), sum(v["size"] for v in delete)
+
+
+def _remark_group(json_data, versions):
+    """Mark only this group's newest version as kept; returns the kept version or None"""
+    before = _group_totals(versions)
+    newest_key = max(versions, key=lambda k: versions[k]["timestamp"] or "", default=None)
+    for key, version in versions.items():
+        version["to_delete"] = key != newest_key
+    after = _group_totals(versions)
+    for name, old, new in zip(("keep_count", "keep_size", "delete_count", "delete_size"), before, after):
+        json_data[name] += new - old
+    return versions.get(newest_key)
+
+
+def watch(directory, output_directory, directories_to_skip=[], has_data_directory=True, path_filter=None, deleted_sink=None, interval=5.0, polling=False, delete_superseded=False, dry_run=False, until=None, throttle=None):
+    """
+    Keep output_directory in step with a File History target that is still being
+    written to. After one full plan and sync, only the file groups named in change
+    notifications are touched: a new newest version is copied over the old copy,
+    superseded versions go to deleted_sink (and are deleted from Data with
+    delete_superseded). A restored copy is never replaced by an older version,
+    even when its own version disappears from Data. Copies and deletions are paced
+    by throttle, if given. Runs until interrupted or until() returns True.
+    """
+    from file_history_cleaner.lib.fs_events import open_watcher
+
+    data_directory = data_directory_of(directory, has_data_directory)
+    of_directory = os.path.join(data_directory, "$OF")
+    own_sink = deleted_sink is None
+    if own_sink:
+        deleted_sink = RecordSink("deleted_files.jsonl")
+    if path_filter is None:
+        path_filter = PathFilter()
+    snapshots = SnapshotTable()
+
+    def relative_parts(path):
+        rel = os.path.relpath(path, data_directory)
+        return [] if rel == "." else rel.split(os.sep)
+
+    def should_watch(path):
+        parts = relative_parts(path)
+        if path == of_directory or any(part in directories_to_skip for part in parts):
+            return False
+        return not path_filter or path_filter.dir_state(parts) is not None
+
+    def prune(version):
+        if delete_superseded and not dry_run:
+            try:
+                if throttle:
+                    throttle.remove(version["src_path"])
+                else:
+                    os.remove(version["src_path"])
+                return True
+            except OSError as e:
+                print(f"[ERROR] Failed to delete {version['src_path']}: {e}")
+        return False
+
+    def supersede(files, base_id, version_key, record=True):
+        versions = files[base_id]["versions"]
+        version = versions[version_key]
+        if record:
+            deleted_sink.write({"src": version["src_path"], "size": version["size"]}, kind="older version")
+        if prune(version):
+            del versions[version_key]
+            json_data["delete_count"] -= 1
+            json_data["delete_size"] -= version["size"]
+            json_data["total_count"] -= 1
+            json_data["total_size"] -= version["size"]
+            stats["pruned"] += 1
+
+    def full_sync():
+        nonlocal json_data
+        # mark_versions already lists the superseded versions in deleted_sink
+        json_data = main(directory, directories_to_skip, False, has_data_directory, deleted_sink, path_filter)
+        files = json_data["files"]
+        for base_id, file_data in files.items():
+            for version_key, version in list(file_data["versions"].items()):
+                if version["to_delete"]:
+                    supersede(files, base_id, version_key, record=False)
+                else:
+                    sync(version, initial=True)
+
+    def sync(version, initial=False):
+        # The output keeps the newest version ever restored to it, even after that
+        # version is removed from Data and an older one is kept by the plan
+        current = restored.get(version["dst_path"])
+        if current is not None and (
+            current["src_path"] == version["src_path"] or (current["timestamp"] or "") > (version["timestamp"] or "")
+        ):
+            return
+        # Whether the kept version changed is known from src_path; only a copy left
+        # by an earlier run, seen on a full sync, is judged by its size and mtime
+        skip_unchanged = initial and current is None
+        stats["copied_size"] += _sync_copy(version, output_directory, dry_run, throttle, skip_unchanged)
+        restored[version["dst_path"]] = version
+
+    def added(path):
+        root, file = os.path.split(path)
+        parts = relative_parts(root)
+        if path_filter and not path_filter.matches(parts, snapshots.parse(file)[0]):
+            return
+        try:
+            version = version_record(data_directory, root, file, snapshots)
+        except OSError:
+            return  # already gone again
+        timestamp_dt = version.pop("timestamp_dt")
+        for key in ("current_name", "original_name"):
+            version.pop(key)
+        files = json_data["files"]
+        base_id = encode_string(version["dst_path"])
+        versions = files.setdefault(base_id, {"versions": {}})["versions"]
+        for existing in versions.values():
+            if existing["src_path"] == version["src_path"]:
+                return  # repeated notification for a version already known
+        old_keep = next((k for k, v in versions.items() if not v.get("to_delete")), None)
+        version["to_delete"] = True
+        version_key = add_version(versions, snapshots.version_key(timestamp_dt), version)
+        json_data["total_count"] += 1
+        json_data["total_size"] += version["size"]
+        json_data["delete_count"] += 1
+        json_data["delete_size"] += version["size"]
+        kept = _remark_group(json_data, versions)
+        stats["events"] += 1
+        if kept is version:
+            sync(version)
+            if old_keep is not None:
+                supersede(files, base_id, old_keep)
+        else:
+            supersede(files, base_id, version_key)
+
+    def removed(path, is_dir):
+        files = json_data["files"]
+        if is_dir:
+            prefix = os.path.abspath(path) + os.sep
+            candidates = [
+                (base_id, key)
+                for base_id, file_data in files.items()
+                for key, version in file_data["versions"].items()
+                if version["src_path"].startswith(prefix)
+            ]
+        else:
+            root, file = os.path.split(path)
+            dst_path = os.path.relpath(os.path.join(root, snapshots.parse(file)[0]), data_directory)
+            base_id = encode_string(dst_path)
+            src_path = os.path.abspath(path)
+            versions = files.get(base_id, {}).get("versions", {})
+            candidates = [(base_id, key) for key, v in versions.items() if v["src_path"] == src_path]
+        for base_id, key in candidates:
+            versions = files[base_id]["versions"]
+            version = versions.pop(key)
+            stats["events"] += 1
+            json_data["total_count"] -= 1
+            json_data["total_size"] -= version["size"]
+            name = "delete" if version.get("to_delete") else "keep"
+            json_data[f"{name}_count"] -= 1
+            json_data[f"{name}_size"] -= version["size"]
+            if not versions:
+                del files[base_id]
+                continue
+            if not version.get("to_delete"):
+                # The kept version went away; the next newest one is kept by the
+                # plan, but only replaces the restored copy if it is not older
+                sync(_remark_group(json_data, versions))
+
+    stats = {"events": 0, "pruned": 0, "copied_size": 0}
+    restored = {}  # dst_path -> version last synced to the output
+    json_data = None
+    # Watching starts before the first sync, so versions written while it runs
+    # are queued and handled below instead of being missed
+    watcher = open_watcher(data_directory, should_watch, interval, polling)
+    try:
+        full_sync()
+        print(f"[INFO] Watching {data_directory} ({type(watcher).__name__}), Ctrl+C to stop")
+        while until is None or not until():
+            for kind, path, is_dir in watcher.read_events(interval):
+                if kind == "rescan":
+                    print("[WARN] Change notifications were lost, rescanning")
+                    full_sync()
+                elif kind == "added":
+                    added(path)
+                elif kind == "removed":
+                    removed(path, is_dir)
+    except KeyboardInterrupt:
+        print("[INFO] Stopping watch")
+    finally:
+        watcher.close()
+        if own_sink:
+            deleted_sink.close()
+
+    if json_data is None:
+        return None
+    print_plan_totals(json_data)
+    print(
+        f"Changes handled: {stats['events']}, superseded versions deleted: {stats['pruned']}, "
+        f"copied: {stats['copied_size'] / (1024 ** 3):.2f} GB"
+    )
+    if throttle:
+        print(throttle.report())
+    return json_data
+
+
+if __name__ == "__main__":
+
+    directory = r"D:\FileHistory\Jake\CHEESEMACHINE"
+    #directory = r"F:\Semi-Bin\D"
+    #directory = r"Z:\Jake\JAKE-E7450"
+    # List more than one target to scan them concurrently into one restore tree
+    directories = [directory]
+    #directories = [r"D:\FileHistory\Jake\CHEESEMACHINE", r"Z:\Jake\JAKE-E7450", r"F:\Semi-Bin\D"]
+    #output_directory = f'./output_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    output_directory = r"D:\CHEESEMACHINE"
+    dry_run = False
+    save_json = True
+    directories_to_skip = []
+    has_data_directory = True
+    concurrency = None  # e.g. 32 for SMB/NFS targets, None copies one file at a time
+    verify = None  # "hash" or "size" to check each copy while copying continues
+    schedule = False  # copy in source disk order, helps spinning USB backup drives
+    archive_format = None  # "tar", "tar.gz", "tar.bz2", "tar.xz" or "zip" to pack output into archives
+    archive_large_files = None  # bytes; files at least this big stay plain files in archive mode
+    # Path prefixes or globs relative to Data, e.g. [r"C\Users\Jake\Documents"] or ["**/node_modules"]
+    include_paths = []
+    exclude_paths = []
+    # Plan from Configuration\Catalog1.edb ("") or an exported catalog directory instead of stat-ing Data
+    catalog_source = None
+    memory_budget = None  # bytes, e.g. 512 * 1024 ** 2 to plan huge targets through sorted runs on disk
+    watch_mode = False  # keep running and restore new versions as File History writes them
+    find_identical = False  # report versions that are byte-identical to another version of the same file
+    # Copy speed limits, e.g. "50M" bytes/s and 200 files/s; None is unlimited. Edit the
+    # throttle file (bytes_per_second = 20M) to change them while the copy runs
+    max_rate = None
+    max_ops = None
+    throttle_file = None
+    
+    # directories_to_skip = [
+    #    ".vscode",
+    # ]
+
+    from file_history_cleaner.lib.throttle import open_throttle
+
+    throttle = open_throttle(max_rate, max_ops, throttle_file) if not dry_run else None
+
+    if watch_mode:
+        # fhc watch TARGET --output DIR
+        with RecordSink("deleted_files.jsonl") as deleted_sink:
+            watch(
+                directory,
+                output_directory,
+                directories_to_skip,
+                has_data_directory,
+                PathFilter(include_paths, exclude_paths),
+                deleted_sink,
+                dry_run=dry_run,
+                throttle=throttle,
+            )
+        sys.exit(0)
+
+    # The same run is available without editing this file: fhc copy TARGET --output DIR
+    with RecordSink("deleted_files.jsonl") as deleted_sink:
+        folder_info = plan(
+            directories,
+            directories_to_skip,
+            save_json,
+            has_data_directory,
+            deleted_sink,
+            path_filter=PathFilter(include_paths, exclude_paths),
+            catalog_source=catalog_source,
+            memory_budget=memory_budget,
+            find_identical=find_identical,
+        )
+
+    restore(
+        folder_info,
+        output_directory,
+        dry_run,
+        concurrency,
+        verify,
+        schedule,
+        archive_format,
+        archive_large_files,
+        throttle,
+    )
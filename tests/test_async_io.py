@@ -0,0 +1,74 @@
+import os
+
+from file_history_cleaner.lib.async_io import LocalFileSystem, copy_files_concurrently
+from file_history_cleaner.lib.throttle import Throttle
+
+
+class CountingFileSystem(LocalFileSystem):
+    def __init__(self):
+        self.calls = []
+
+    def stat(self, path):
+        self.calls.append("stat")
+        return super().stat(path)
+
+    def makedirs(self, path):
+        self.calls.append("makedirs")
+        super().makedirs(path)
+
+    def listdir(self, path):
+        self.calls.append("listdir")
+        return super().listdir(path)
+
+    def copy2(self, src, dst):
+        self.calls.append("copy2")
+        super().copy2(src, dst)
+
+
+def make_jobs(tmp_path, count):
+    source = tmp_path / "source"
+    source.mkdir()
+    jobs = []
+    for i in range(count):
+        src = source / f"f{i}.txt"
+        src.write_text(str(i))
+        dest_dir = str(tmp_path / "out")
+        jobs.append((str(src), dest_dir, os.path.join(dest_dir, f"f{i}.txt"), src.stat().st_size))
+    return jobs
+
+
+def test_one_listing_per_destination_directory(tmp_path, capsys):
+    jobs = make_jobs(tmp_path, 20)
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "f3.txt").write_text("stale")
+    fs = CountingFileSystem()
+    copied, errors = copy_files_concurrently(jobs, concurrency=8, fs=fs)
+    assert (copied, errors) == (20, [])
+    assert sorted(set(fs.calls)) == ["copy2", "listdir", "makedirs"]
+    assert fs.calls.count("listdir") == 1 and fs.calls.count("makedirs") == 1
+    assert (tmp_path / "out" / "f3.txt").read_text() == "3"
+    # Printed like the sequential copy path's notice, so it shows without any logging setup
+    assert capsys.readouterr().out == f"File already exists, overwriting: {jobs[3][2]}\n"
+
+
+def test_missing_source_is_reported(tmp_path):
+    jobs = make_jobs(tmp_path, 2)
+    os.remove(jobs[0][0])
+    copied, errors = copy_files_concurrently(jobs, concurrency=2)
+    assert copied == 1
+    ((job, error),) = errors
+    assert job == jobs[0]
+    assert isinstance(error, FileNotFoundError)
+
+
+def test_unknown_sizes_are_only_stat_for_a_byte_rate(tmp_path):
+    jobs = [(src, dest_dir, dest_file, None) for src, dest_dir, dest_file, _ in make_jobs(tmp_path, 4)]
+    fs = CountingFileSystem()
+    assert copy_files_concurrently(jobs, concurrency=2, fs=fs, throttle=Throttle(ops_per_second=1000)) == (4, [])
+    assert "stat" not in fs.calls
+
+    fs = CountingFileSystem()
+    throttle = Throttle(bytes_per_second="1M")
+    assert copy_files_concurrently(jobs, concurrency=2, fs=fs, throttle=throttle) == (4, [])
+    assert fs.calls.count("stat") == 4
+    assert throttle.total_bytes == 4
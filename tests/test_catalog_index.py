@@ -0,0 +1,133 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+from file_history_cleaner.lib.catalog_index import _columnar_rows, iter_catalog_versions, load_backupset_times
+from file_history_cleaner.lib.columnar import ColumnarWriter
+from file_history_cleaner.lib.sinks import RecordSink
+from file_history_cleaner.main import main_budgeted
+
+
+def write_csv(path, header, rows):
+    # Quoted like catalog.ps1's ConvertTo-Csv output
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def le_hex(value, width):
+    return value.to_bytes(width, "little").hex()
+
+
+def make_catalog(catalog_dir, hex_ints=False):
+    """
+    Two backup runs and one file captured in each, with the columns
+    catalog.ps1 exports. hex_ints writes the file table's Int32/Int64 columns
+    the way export_table_to_csv does, as raw little-endian hex.
+    """
+    os.makedirs(catalog_dir)
+    write_csv(
+        os.path.join(catalog_dir, "backupset.csv"),
+        ["id", "timestamp"],
+        [["17", "3/1/2021 10:00:00 AM"], ["18", "2021-03-02T10:00:00"]],
+    )
+    write_csv(os.path.join(catalog_dir, "string.csv"), ["id", "string"], [["5", "C:\\Users\\Jake"], ["6", "report.docx"]])
+    write_csv(os.path.join(catalog_dir, "namespace.csv"), ["id", "parentId", "childId"], [["40", "5", "6"]])
+
+    def cell(value, width):
+        return le_hex(value, width) if hex_ints else str(value)
+
+    # tCaptured/tQueued are backupset ids; 17 is "11000000" in hex, all digits
+    write_csv(
+        os.path.join(catalog_dir, "file.csv"),
+        ["id", "parentId", "childId", "state", "status", "fileSize", "tQueued", "tCaptured", "tUpdated"],
+        [
+            ["100", "5", cell(40, 4), cell(0, 2), cell(0, 2), cell(1000, 8), cell(17, 4), cell(17, 4), cell(17, 4)],
+            ["101", "5", cell(40, 4), cell(0, 2), cell(0, 2), cell(2500, 8), cell(18, 4), cell(0, 4), cell(18, 4)],
+        ],
+    )
+
+
+def versions(catalog_dir, data_dir):
+    return sorted(iter_catalog_versions(str(catalog_dir), str(data_dir)), key=lambda v: v["timestamp"])
+
+
+def test_versions_are_dated_by_their_backupset(tmp_path):
+    make_catalog(tmp_path / "catalog")
+    assert load_backupset_times(str(tmp_path / "catalog")) == {
+        17: datetime(2021, 3, 1, 10, 0, 0),
+        18: datetime(2021, 3, 2, 10, 0, 0),
+    }
+    first, second = versions(tmp_path / "catalog", tmp_path / "Data")
+    assert first["timestamp"] == "2021-03-01T10:00:00Z"
+    assert first["size"] == 1000
+    assert first["current_name"] == "report (2021_03_01 10_00_00 UTC).docx"
+    assert first["src_path"] == os.path.abspath(
+        os.path.join(tmp_path / "Data", "C", "Users", "Jake", "report (2021_03_01 10_00_00 UTC).docx")
+    )
+    # tCaptured 0 is not a backupset, tQueued dates the version instead
+    assert second["timestamp"] == "2021-03-02T10:00:00Z"
+    assert second["size"] == 2500
+
+
+def test_hex_export_decodes_by_column_width(tmp_path):
+    make_catalog(tmp_path / "plain")
+    make_catalog(tmp_path / "hex", hex_ints=True)
+    plain = versions(tmp_path / "plain", tmp_path / "Data")
+    hexed = versions(tmp_path / "hex", tmp_path / "Data")
+    assert [v["timestamp"] for v in hexed] == ["2021-03-01T10:00:00Z", "2021-03-02T10:00:00Z"]
+    assert hexed == plain
+
+
+def test_eight_digit_decimal_ids_stay_decimal(tmp_path):
+    catalog_dir = tmp_path / "catalog"
+    make_catalog(catalog_dir)
+    # A large catalog whose backupset ids happen to be eight digits long
+    write_csv(os.path.join(catalog_dir, "backupset.csv"), ["id", "timestamp"], [["11000000", "2021-03-01T10:00:00"]])
+    write_csv(
+        os.path.join(catalog_dir, "file.csv"),
+        ["id", "parentId", "childId", "fileSize", "tQueued", "tCaptured"],
+        [["100", "5", "40", "1000", "11000000", "11000000"]],
+    )
+    (version,) = versions(catalog_dir, tmp_path / "Data")
+    assert version["timestamp"] == "2021-03-01T10:00:00Z"
+
+
+def test_budgeted_plan_keeps_catalog_hash(tmp_path):
+    catalog_dir = tmp_path / "catalog"
+    make_catalog(catalog_dir)
+    write_csv(
+        os.path.join(catalog_dir, "file.csv"),
+        ["id", "parentId", "childId", "fileSize", "tQueued", "tCaptured", "hash"],
+        [["100", "5", "40", "1000", "17", "17", "AB CD"], ["101", "5", "40", "2500", "18", "18", "EF 01"]],
+    )
+    folder = tmp_path / "target" / "Data" / "C" / "Users" / "Jake"
+    folder.mkdir(parents=True)
+    for version in versions(catalog_dir, tmp_path / "target" / "Data"):
+        open(version["src_path"], "wb").close()
+
+    plan_path = str(tmp_path / "plan.jsonl")
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        main_budgeted(
+            [str(tmp_path / "target")], 1024 ** 2, save_json=False, deleted_sink=deleted_sink,
+            catalog_source=str(catalog_dir), plan_path=plan_path,
+        )
+    with open(plan_path, encoding="utf-8") as f:
+        (group,) = [json.loads(line) for line in f]
+    assert sorted(v["hash"] for v in group["versions"].values()) == ["catalog:abcd", "catalog:ef01"]
+
+
+def test_columnar_rows_release_the_table(tmp_path):
+    writer = ColumnarWriter(str(tmp_path / "string"), "string", ["id", "string"])
+    for string_id in range(3):
+        writer.append([string_id, f"name{string_id}".encode("utf-8")])
+    writer.close()
+    assert list(_columnar_rows(str(tmp_path / "string"), ("id", "string"))) == [
+        {"id": 0, "string": "name0"}, {"id": 1, "string": "name1"}, {"id": 2, "string": "name2"}
+    ]
+    # Stopping early closes the table while the generator is suspended mid-row
+    rows = _columnar_rows(str(tmp_path / "string"), ("id", "string"))
+    next(rows)
+    rows.close()
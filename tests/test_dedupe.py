@@ -0,0 +1,94 @@
+import os
+
+from file_history_cleaner.lib.dedupe import EDGE_SIZE, find_identical_versions
+from file_history_cleaner.main import keep_present_versions
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def plan_of(tmp_path, contents, hashes=None):
+    """One file group with a version per content, the last one kept"""
+    versions = {}
+    for i, data in enumerate(contents):
+        versions[f"v2021030{i + 1}100000"] = {
+            "src_path": write(tmp_path / f"a{i}.bin", data),
+            "size": len(data),
+            "timestamp": f"2021-03-0{i + 1}T10:00:00Z",
+            "to_delete": i < len(contents) - 1,
+        }
+        if hashes:
+            versions[f"v2021030{i + 1}100000"]["hash"] = hashes[i]
+    return {"files": {"YQ==": {"versions": versions}}}
+
+
+def identical(json_data):
+    versions = json_data["files"]["YQ=="]["versions"]
+    return {key: version["identical_to"] for key, version in versions.items() if "identical_to" in version}
+
+
+def test_different_sizes_are_never_read(tmp_path):
+    json_data = plan_of(tmp_path, [b"one", b"three"])
+    assert find_identical_versions(json_data, workers=1) == (0, 0, 0)
+
+
+def test_small_files_are_hashed_whole_in_one_read(tmp_path):
+    json_data = plan_of(tmp_path, [b"same", b"diff", b"same"])
+    assert find_identical_versions(json_data, workers=1) == (1, 4, 12)
+    # The older copy repeats the kept newest one
+    assert identical(json_data) == {"v20210301100000": "v20210303100000"}
+
+
+def test_edge_hash_rules_out_files_without_full_reads(tmp_path):
+    size = 3 * EDGE_SIZE
+    json_data = plan_of(tmp_path, [b"a" + bytes(size - 1), b"b" + bytes(size - 1)])
+    # Only the two edges of each file are read, and they differ
+    assert find_identical_versions(json_data, workers=1) == (0, 0, 2 * 2 * EDGE_SIZE)
+
+
+def test_full_hash_settles_matching_edges(tmp_path):
+    size = 3 * EDGE_SIZE
+    middle_differs = bytearray(size)
+    middle_differs[size // 2] = 1
+    json_data = plan_of(tmp_path, [bytes(size), bytes(middle_differs), bytes(size)])
+    redundant, redundant_size, bytes_read = find_identical_versions(json_data, workers=1)
+    assert (redundant, redundant_size) == (1, size)
+    assert bytes_read == 3 * 2 * EDGE_SIZE + 3 * size
+    assert identical(json_data) == {"v20210301100000": "v20210303100000"}
+
+
+def test_catalog_hashes_are_reused_without_reading(tmp_path):
+    json_data = plan_of(tmp_path, [b"one", b"two"], hashes=["catalog:ab", "catalog:ab"])
+    # Trusted as they are: the files themselves are never opened
+    assert find_identical_versions(json_data, workers=1) == (1, 3, 0)
+
+
+def test_listing_fallback_does_not_inherit_the_catalog_hash(tmp_path):
+    folder = tmp_path / "Data" / "docs"
+    folder.mkdir(parents=True)
+    write(folder / "a (2021_03_01 10_00_00 UTC).txt", b"one")
+    write(folder / "a (2021_03_02 10_00_00 UTC).txt", b"two")
+    # The catalog lists a version Data no longer has
+    catalog_version = {
+        "current_name": "a (2021_03_03 10_00_00 UTC).txt",
+        "original_name": "a.txt",
+        "src_folder": "docs",
+        "src_path": os.path.join(folder, "a (2021_03_03 10_00_00 UTC).txt"),
+        "dst_path": os.path.join("docs", "a.txt"),
+        "size": 3,
+        "timestamp": "2021-03-03T10:00:00Z",
+        "timestamp_dt": None,
+        "hash": "catalog:ab",
+    }
+    versions = {"v20210303100000": catalog_version}
+    assert keep_present_versions(versions, lambda path: set(os.listdir(path))) == (1, True)
+    assert sorted(versions) == ["v20210301100000", "v20210302100000"]
+    assert not any("hash" in version for version in versions.values())
+
+    for key, version in versions.items():
+        version["to_delete"] = key == "v20210301100000"
+    json_data = {"files": {"YQ==": {"versions": versions}}}
+    assert find_identical_versions(json_data, workers=1) == (0, 0, 6)
@@ -0,0 +1,106 @@
+import sys
+import textwrap
+
+import pytest
+
+from file_history_cleaner.lib.edb_extractor import export_table_to_csv
+
+# Stands in for libesedb's Python bindings: one "string" table whose record 7
+# is unreadable (skipped) and, with STOP set, a bad page that ends the export
+FAKE_PYESEDB = textwrap.dedent(
+    '''
+    import os
+
+    RECORDS = 50
+    STOP = int(os.environ.get("FAKE_ESEDB_STOP", "-1"))
+    COLUMNS = ["id", "string", "timestamp"]
+
+
+    class Column:
+        def __init__(self, name):
+            self.name = name
+
+        def get_name(self):
+            return self.name
+
+
+    class Record:
+        def __init__(self, i):
+            self.i = i
+
+        def get_value_data(self, col_idx):
+            name = COLUMNS[col_idx]
+            if name == "id":
+                return self.i.to_bytes(4, "little")
+            if name == "string":
+                return f"C:\\\\Users\\\\J\\u00e4ke\\\\{self.i}".encode("utf-16le")
+            return (132000000000000000 + self.i).to_bytes(8, "little")
+
+
+    class Table:
+        def get_name(self):
+            return "string"
+
+        def get_number_of_records(self):
+            return RECORDS
+
+        def get_number_of_columns(self):
+            return len(COLUMNS)
+
+        def get_column(self, col_idx):
+            return Column(COLUMNS[col_idx])
+
+        def get_record(self, i):
+            if i == STOP:
+                raise OSError("bad page")
+            if i == 7:
+                raise ValueError("odd record")
+            if i >= RECORDS:
+                raise IndexError(i)
+            return Record(i)
+
+
+    class file:
+        def open(self, path):
+            pass
+
+        def close(self):
+            pass
+
+        def get_number_of_tables(self):
+            return 1
+
+        def get_table(self, i):
+            return Table()
+    '''
+)
+
+
+@pytest.fixture
+def fake_pyesedb(tmp_path, monkeypatch):
+    module_dir = tmp_path / "fake_modules"
+    module_dir.mkdir()
+    (module_dir / "pyesedb.py").write_text(FAKE_PYESEDB, encoding="utf-8")
+    # Worker processes import it too, however they are started
+    monkeypatch.syspath_prepend(str(module_dir))
+    monkeypatch.setenv("PYTHONPATH", str(module_dir))
+    monkeypatch.delitem(sys.modules, "pyesedb", raising=False)
+    return monkeypatch
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("stop", [None, 23])
+def test_parallel_export_matches_serial(tmp_path, fake_pyesedb, stop):
+    if stop is not None:
+        fake_pyesedb.setenv("FAKE_ESEDB_STOP", str(stop))
+    serial = tmp_path / "serial.csv"
+    parallel = tmp_path / "parallel.csv"
+    export_table_to_csv("Catalog1.edb", "string", str(serial))
+    export_table_to_csv("Catalog1.edb", "string", str(parallel), workers=3, chunk_size=5)
+    lines = read(serial).splitlines()
+    assert len(lines) == 1 + (stop or 50) - 1  # header, minus the skipped record 7
+    assert read(parallel) == read(serial)
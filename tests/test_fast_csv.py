@@ -0,0 +1,45 @@
+import csv
+
+from file_history_cleaner.lib.fast_csv import _parse_range, iter_columns, read_header, split_line_ranges
+
+
+def write_table(path, rows):
+    # Quoted like catalog.ps1's ConvertTo-Csv output, with a BOM as PowerShell writes it
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["id", "parentId", "string"])
+        writer.writerows(rows)
+    return str(path)
+
+
+def make_rows(count):
+    names = ["report.docx", "two\nlines", 'say "hi"\n', "", "C:\\Users\\Jake", "ends with \r\n", "\n\n\n"]
+    return [[str(i), str(i // 3), names[i % len(names)] * (1 + i % 4)] for i in range(count)]
+
+
+def dict_rows(path, columns):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [tuple(row[c] for c in columns) for row in csv.DictReader(f)]
+
+
+def test_serial_read_matches_dict_reader(tmp_path):
+    path = write_table(tmp_path / "string.csv", make_rows(200))
+    for columns in (("id", "string"), ("string",), ("string", "id", "parentId")):
+        assert list(iter_columns(path, columns)) == dict_rows(path, columns)
+    assert [list(row) for row in iter_columns(path)] == make_rows(200)
+
+
+def test_chunks_never_split_a_quoted_newline(tmp_path):
+    path = write_table(tmp_path / "string.csv", make_rows(200))
+    _, data_offset = read_header(path)
+    expected = dict_rows(path, ("id", "string"))
+    for parts in range(2, 40):
+        rows = []
+        for start, end in split_line_ranges(path, data_offset, parts):
+            rows.extend(zip(*_parse_range(path, start, end, ("id", "string"))))
+        assert rows == expected, parts
+
+
+def test_parallel_read_matches_dict_reader(tmp_path):
+    path = write_table(tmp_path / "string.csv", make_rows(500))
+    assert list(iter_columns(path, ("id", "string"), workers=3)) == dict_rows(path, ("id", "string"))
@@ -0,0 +1,45 @@
+import os
+
+from file_history_cleaner.lib.sinks import RecordSink
+from file_history_cleaner.main import encode_string, main_multi
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def test_newest_version_of_each_path_wins_across_targets(tmp_path):
+    old_drive = tmp_path / "old" / "Data" / "C" / "docs"
+    new_drive = tmp_path / "new" / "Data" / "C" / "docs"
+    write(old_drive / "a (2021_03_01 10_00_00 UTC).txt", "a1")
+    write(old_drive / "a (2021_03_03 10_00_00 UTC).txt", "a3")
+    write(new_drive / "a (2021_03_02 10_00_00 UTC).txt", "a2")
+    # Both targets hold the same version of b.txt
+    write(old_drive / "b (2021_03_01 10_00_00 UTC).txt", "b")
+    write(new_drive / "b (2021_03_01 10_00_00 UTC).txt", "b")
+    write(new_drive / "only (2021_03_01 10_00_00 UTC).txt", "c")
+
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        json_data = main_multi(
+            [str(tmp_path / "old"), str(tmp_path / "new")], save_json=False, deleted_sink=deleted_sink
+        )
+
+    kept = {}
+    for file_data in json_data["files"].values():
+        for key, version in file_data["versions"].items():
+            assert version["src_folder"] == os.path.join("C", "docs")
+            if not version["to_delete"]:
+                kept[version["dst_path"]] = (key, os.path.relpath(version["src_path"], tmp_path))
+    docs = os.path.join("Data", "C", "docs")
+    assert kept == {
+        os.path.join("C", "docs", "a.txt"): ("v20210303100000", os.path.join("old", docs, "a (2021_03_03 10_00_00 UTC).txt")),
+        os.path.join("C", "docs", "b.txt"): ("v20210301100000", os.path.join("old", docs, "b (2021_03_01 10_00_00 UTC).txt")),
+        os.path.join("C", "docs", "only.txt"): ("v20210301100000", os.path.join("new", docs, "only (2021_03_01 10_00_00 UTC).txt")),
+    }
+    # The second target's copy of b.txt is kept apart under a suffixed key
+    b_versions = json_data["files"][encode_string(os.path.join("C", "docs", "b.txt"))]["versions"]
+    assert sorted(b_versions) == ["v20210301100000", "v20210301100000_1"]
+    assert b_versions["v20210301100000_1"]["to_delete"]
+    assert (json_data["total_count"], json_data["keep_count"], json_data["delete_count"]) == (6, 3, 3)
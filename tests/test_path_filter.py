@@ -0,0 +1,89 @@
+import os
+
+from file_history_cleaner.lib.path_filter import PathFilter
+from file_history_cleaner.main import scan_directory
+
+
+def selected(path_filter, path):
+    *parts, name = path.split("/")
+    return path_filter.matches(parts, name)
+
+
+def test_no_rules_select_everything():
+    path_filter = PathFilter()
+    assert not path_filter
+    assert selected(path_filter, "C/Users/Jake/report.docx")
+
+
+def test_include_is_a_case_insensitive_prefix():
+    path_filter = PathFilter(include=["C:\\Users\\Jake\\Documents"])
+    assert selected(path_filter, "C/Users/Jake/Documents/report.docx")
+    assert selected(path_filter, "c/users/jake/documents/deep/down/a.txt")
+    assert not selected(path_filter, "C/Users/Jake/Pictures/a.jpg")
+    assert not selected(path_filter, "C/Users/Jake/report.docx")
+
+
+def test_exclude_wins_over_include():
+    path_filter = PathFilter(include=["C/Users"], exclude=["C/Users/*/AppData"])
+    assert selected(path_filter, "C/Users/Jake/report.docx")
+    assert not selected(path_filter, "C/Users/Jake/AppData/Local/cache.bin")
+    assert not selected(path_filter, "C/Windows/win.ini")
+
+
+def test_double_star_matches_any_number_of_folders():
+    path_filter = PathFilter(exclude=["**/node_modules", "**/*.tmp"])
+    assert not selected(path_filter, "node_modules/a.js")
+    assert not selected(path_filter, "C/src/app/node_modules/lib/a.js")
+    assert not selected(path_filter, "C/src/build.tmp")
+    assert selected(path_filter, "C/src/app/index.js")
+    # Only whole components match
+    assert selected(path_filter, "C/src/node_modules_backup/a.js")
+
+
+def test_steps_reject_a_subtree_before_it_is_listed():
+    path_filter = PathFilter(include=["C/Users/Jake"])
+    root = path_filter.root_state()
+    assert path_filter.accepts_dir(root, "C")
+    assert not path_filter.accepts_dir(root, "D")
+    # Neither included nor excluded yet: a folder on the way to an include is walked, its files are not selected
+    assert not path_filter.accepts_file(path_filter.step(root, "C"), "a.txt")
+
+
+def test_scan_directory_does_not_list_filtered_folders(tmp_path, monkeypatch):
+    data = tmp_path / "Data"
+    for folder in ("C/Users/Jake", "C/Users/Jake/AppData/Local", "C/Windows/System32"):
+        (data / folder).mkdir(parents=True)
+        (data / folder / "a (2021_03_01 10_00_00 UTC).txt").write_text("a")
+
+    listed = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        listed.append(os.path.relpath(path, data))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    path_filter = PathFilter(include=["C/Users"], exclude=["**/AppData"])
+    json_data = scan_directory(str(tmp_path), path_filter=path_filter)
+
+    assert [v["dst_path"] for f in json_data["files"].values() for v in f["versions"].values()] == [
+        os.path.join("C", "Users", "Jake", "a.txt")
+    ]
+    assert sorted(listed) == [".", "C", os.path.join("C", "Users"), os.path.join("C", "Users", "Jake")]
+
+
+def test_directory_states_are_computed_once_per_folder():
+    # The catalog recovery matches every $OF entry by its folder's components
+    steps = []
+
+    class CountingFilter(PathFilter):
+        def step(self, state, name):
+            steps.append(name)
+            return super().step(state, name)
+
+    path_filter = CountingFilter(exclude=["C/Users/*/AppData"])
+    for name in ("a.txt", "b.txt", "c.txt"):
+        assert path_filter.matches(["C", "Users", "Jake"], name)
+    assert not path_filter.matches(["C", "Users", "Jake", "AppData", "Local"], "d.txt")
+    # One step per folder on the way down, then one per file name
+    assert steps == ["C", "Users", "Jake", "a.txt", "b.txt", "c.txt", "AppData"]
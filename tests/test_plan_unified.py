@@ -0,0 +1,74 @@
+import csv
+import os
+
+from file_history_cleaner.catalog import plan_unified
+from file_history_cleaner.lib.sinks import RecordSink
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def make_target(tmp_path):
+    """
+    Data has two versions each of report.docx and notes.txt; $OF holds a
+    REPORT.docx from the same run as Data's newest report, a newer notes.txt
+    and a todo.txt that only $OF has. $OF folder 5 is C:\\Users\\Jake.
+    """
+    jake = tmp_path / "target" / "Data" / "C" / "Users" / "Jake"
+    write(jake / "report (2021_03_01 10_00_00 UTC).docx", "data old")
+    write(jake / "report (2021_03_02 10_00_00 UTC).docx", "data new")
+    write(jake / "notes (2021_03_01 10_00_00 UTC).txt", "data")
+    of_folder = tmp_path / "target" / "Data" / "$OF" / "5"
+    write(of_folder / "6 (2021_03_02 10_00_00 UTC).docx", "of")
+    write(of_folder / "7 (2021_03_03 10_00_00 UTC).txt", "of newer")
+    write(of_folder / "8 (2021_03_01 10_00_00 UTC).txt", "of only")
+
+    catalog_dir = tmp_path / "catalog"
+    catalog_dir.mkdir()
+    write_csv(
+        catalog_dir / "string.csv",
+        ["id", "string"],
+        [["5", "C:\\Users\\Jake"], ["6", "REPORT.docx"], ["7", "notes.txt"], ["8", "todo.txt"]],
+    )
+    write_csv(catalog_dir / "file.csv", ["id", "parentId", "childId"], [])
+    write_csv(catalog_dir / "namespace.csv", ["id", "parentId", "childId"], [])
+    return str(tmp_path / "target"), str(catalog_dir)
+
+
+def kept_versions(json_data):
+    return {
+        version["dst_path"].casefold(): (version.get("source", "Data"), os.path.basename(version["src_path"]))
+        for file_data in json_data["files"].values()
+        for version in file_data["versions"].values()
+        if not version["to_delete"]
+    }
+
+
+def test_each_path_is_restored_once_from_the_newest_copy(tmp_path):
+    directory, catalog_dir = make_target(tmp_path)
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        json_data = plan_unified(
+            directory, catalog_dir, deleted_sink=deleted_sink, bad_paths_log=str(tmp_path / "bad_paths.jsonl")
+        )
+
+    # REPORT.docx and report.docx are one path on Windows
+    assert len(json_data["files"]) == 3
+    assert json_data["keep_count"] == 3
+    assert json_data["total_count"] == 6
+    jake = os.path.join("c", "users", "jake")
+    assert kept_versions(json_data) == {
+        # Same timestamp in both, the Data copy wins
+        os.path.join(jake, "report.docx"): ("Data", "report (2021_03_02 10_00_00 UTC).docx"),
+        os.path.join(jake, "notes.txt"): ("$OF", "7 (2021_03_03 10_00_00 UTC).txt"),
+        os.path.join(jake, "todo.txt"): ("$OF", "8 (2021_03_01 10_00_00 UTC).txt"),
+    }
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+import pytest
+
+from file_history_cleaner.lib.throttle import Throttle, open_throttle, parse_rate
+
+
+def test_parse_rate():
+    assert parse_rate("50M") == 50 * 1024 ** 2
+    assert parse_rate("1.5G/s") == 1.5 * 1024 ** 3
+    assert parse_rate("200") == 200
+    assert parse_rate("0") is None
+    assert parse_rate("none") is None
+    assert parse_rate(None) is None
+
+
+def test_bucket_paces_operations():
+    throttle = Throttle(ops_per_second=100, burst_seconds=0.1)
+    start = time.monotonic()
+    for _ in range(40):
+        throttle.acquire(ops=1)
+    # 10 ops come from the burst, the other 30 at 100/s
+    elapsed = time.monotonic() - start
+    assert 0.25 <= elapsed < 1.0
+    assert throttle.total_ops == 40
+
+
+def test_bucket_paces_bytes():
+    throttle = Throttle(bytes_per_second="1M", burst_seconds=0.1)
+    start = time.monotonic()
+    for _ in range(6):
+        throttle.acquire(64 * 1024)
+    # 384 KB with a 102 KB burst at 1 MB/s
+    elapsed = time.monotonic() - start
+    assert 0.2 <= elapsed < 1.0
+    assert throttle.total_bytes == 6 * 64 * 1024
+
+
+def test_unlimited_throttle_never_waits():
+    throttle = Throttle(ops_per_second="100")
+    throttle.set_limits(None, None)
+    start = time.monotonic()
+    for _ in range(1000):
+        throttle.acquire(1024 ** 2, 1)
+    assert time.monotonic() - start < 0.5
+    assert throttle.waited == 0
+
+
+def test_control_file_is_reloaded_while_running(tmp_path):
+    control_file = tmp_path / "throttle.conf"
+    control_file.write_text("bytes_per_second = 50M  # start slow\nops_per_second = 200\n")
+    throttle = Throttle(control_file=str(control_file))
+    assert (throttle.bytes.rate, throttle.ops.rate) == (50 * 1024 ** 2, 200)
+
+    control_file.write_text("bytes_per_second = none\nops_per_second = 10\n")
+    os.utime(control_file, ns=(0, 10 ** 18))
+    throttle.next_control_check = 0.0
+    throttle.acquire(ops=1)
+    assert (throttle.bytes.rate, throttle.ops.rate) == (None, 10)
+
+    # SIGHUP only raises the flag; the next acquire re-reads the file
+    control_file.write_text("ops_per_second = 20\n")
+    throttle.reload_requested = True
+    throttle.acquire(ops=1)
+    assert throttle.ops.rate == 20
+
+
+def test_signal_handlers_are_skipped_off_the_main_thread(tmp_path):
+    errors = []
+
+    def install():
+        try:
+            open_throttle(max_ops=10, control_file=str(tmp_path / "missing.conf"))
+        except ValueError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=install)
+    thread.start()
+    thread.join()
+    assert errors == []
+
+
+def test_copy2_counts_bytes(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"x" * 3000)
+    for throttle in (Throttle(ops_per_second=100), Throttle(bytes_per_second="1M")):
+        dst = tmp_path / "dst.bin"
+        throttle.copy2(str(src), str(dst))
+        assert dst.read_bytes() == src.read_bytes()
+        assert (throttle.total_bytes, throttle.total_ops) == (3000, 1)
+
+
+@pytest.mark.skipif(not hasattr(os, "kill") or os.name != "posix", reason="POSIX signals")
+def test_sighup_is_applied_by_acquire(tmp_path):
+    import signal
+
+    control_file = tmp_path / "throttle.conf"
+    control_file.write_text("ops_per_second = 1000\n")
+    previous = signal.getsignal(signal.SIGHUP), signal.getsignal(signal.SIGUSR1)
+    try:
+        throttle = open_throttle(control_file=str(control_file))
+        control_file.write_text("ops_per_second = 500\n")
+        os.kill(os.getpid(), signal.SIGHUP)
+        assert throttle.reload_requested
+        throttle.acquire(ops=1)
+        assert throttle.ops.rate == 500 and not throttle.reload_requested
+    finally:
+        signal.signal(signal.SIGHUP, previous[0])
+        signal.signal(signal.SIGUSR1, previous[1])
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from file_history_cleaner.lib.archive_writer import ArchiveWriter
+from file_history_cleaner.lib.verify import Verifier
+
+
+@pytest.mark.parametrize("archive_format", ["tar.gz", "zip"])
+def test_archive_members_are_verified(tmp_path, archive_format):
+    sources = []
+    for i in range(6):
+        src = tmp_path / f"f{i}.txt"
+        src.write_bytes(bytes([i]) * 100)
+        sources.append(src)
+    report_path = str(tmp_path / "verify_report.jsonl")
+    verifier = Verifier("hash", workers=1, report_path=report_path)
+    # 250-byte shards: two members each, three shards
+    archive = ArchiveWriter(str(tmp_path / "out"), archive_format, shard_size=250, verifier=verifier)
+    for i, src in enumerate(sources):
+        archive.add(str(src), f"docs\\f{i}.txt")
+        if i == 1:
+            # Changed after it was archived, same size
+            src.write_bytes(b"x" * 100)
+    assert archive.close()[2] == 3
+
+    assert verifier.close() == (6, 1)
+    with open(report_path, encoding="utf-8") as f:
+        (mismatch,) = [json.loads(line) for line in f]
+    assert mismatch["src"] == str(sources[1])
+    assert mismatch["dest"].endswith(":docs/f1.txt")
+    assert mismatch["reason"] == "content mismatch"
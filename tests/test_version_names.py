@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from file_history_cleaner.lib.version_names import SnapshotTable, add_version, version_key
+
+
+def test_name_without_stamp_is_undated():
+    snapshots = SnapshotTable()
+    assert snapshots.parse("notes.txt") == ("notes.txt", None)
+    assert snapshots.version_key(None) == "v_unknown"
+    assert len(snapshots) == 0
+
+
+def test_first_stamp_dates_the_version_and_every_stamp_is_dropped():
+    snapshots = SnapshotTable()
+    base, snapshot = snapshots.parse("a (2021_03_01 10_00_00 UTC) (2020_01_02 03_04_05 UTC).txt")
+    assert base == "a.txt"
+    assert snapshot.iso == "2021-03-01T10:00:00Z"
+    assert snapshot.key == "v20210301100000"
+    assert len(snapshots) == 1
+
+
+def test_stamp_only_name_has_an_empty_base():
+    base, snapshot = SnapshotTable().parse(" (2021_03_01 10_00_00 UTC)")
+    assert base == ""
+    assert snapshot.dt == datetime(2021, 3, 1, 10, 0, 0)
+
+
+def test_one_snapshot_per_backup_run():
+    snapshots = SnapshotTable()
+    _, first = snapshots.parse("a (2021_03_01 10_00_00 UTC).txt")
+    _, second = snapshots.parse("b (2021_03_01 10_00_00 UTC)")
+    assert first is second
+    # Datetimes from elsewhere (a catalog, a saved plan) get the same key
+    assert snapshots.version_key(datetime(2021, 3, 1, 10, 0, 0)) == "v20210301100000"
+    assert snapshots.version_key(datetime(2022, 1, 1)) == version_key(datetime(2022, 1, 1)) == "v20220101000000"
+
+
+def test_colliding_keys_get_a_suffix():
+    versions = {}
+    assert [add_version(versions, "v_unknown", {}) for _ in range(3)] == ["v_unknown", "v_unknown_1", "v_unknown_2"]
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from file_history_cleaner.lib.sinks import RecordSink
+from file_history_cleaner.main import plan, watch
+
+
+def write_version(folder, name, content, mtime):
+    path = os.path.join(folder, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_removed_newest_version_does_not_downgrade_output(tmp_path):
+    docs = tmp_path / "target" / "Data" / "C" / "docs"
+    docs.mkdir(parents=True)
+    write_version(docs, "a (2021_03_01 10_00_00 UTC).txt", "old", 1614592800)
+    newest = write_version(docs, "a (2021_03_02 10_00_00 UTC).txt", "new", 1614679200)
+    output = tmp_path / "restore"
+    restored = os.path.join(output, "C", "docs", "a.txt")
+    steps = []
+
+    def until():
+        steps.append(read(restored))
+        if len(steps) == 1:
+            # File History's own cleanup removes the newest version
+            os.remove(newest)
+        return len(steps) > 10
+
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        json_data = watch(
+            str(tmp_path / "target"), str(output), deleted_sink=deleted_sink, interval=0.02, polling=True, until=until
+        )
+
+    assert steps[0] == "new"
+    assert set(steps) == {"new"}
+    assert json_data["total_count"] == 1
+
+
+def test_missing_data_directory_fails_loudly(tmp_path):
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        with pytest.raises(FileNotFoundError):
+            plan([str(tmp_path)], save_json=False, deleted_sink=deleted_sink)
+        with pytest.raises(FileNotFoundError):
+            watch(str(tmp_path), str(tmp_path / "restore"), deleted_sink=deleted_sink, polling=True, until=lambda: True)
+
+
+def test_newer_version_with_same_size_and_mtime_second_is_copied(tmp_path):
+    docs = tmp_path / "target" / "Data" / "C" / "docs"
+    docs.mkdir(parents=True)
+    write_version(docs, "a (2021_03_01 10_00_00 UTC).txt", "old", 1614592800.1)
+    output = tmp_path / "restore"
+    restored = os.path.join(output, "C", "docs", "a.txt")
+    steps = []
+
+    def until():
+        steps.append(read(restored))
+        if len(steps) == 1:
+            # Same size, and an mtime within the same second
+            write_version(docs, "a (2021_03_02 10_00_00 UTC).txt", "new", 1614592800.6)
+        return len(steps) > 10
+
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        watch(
+            str(tmp_path / "target"), str(output), deleted_sink=deleted_sink, interval=0.02, polling=True,
+            delete_superseded=True, until=until,
+        )
+
+    assert steps[0] == "old"
+    assert steps[-1] == "new"
+    assert os.listdir(docs) == ["a (2021_03_02 10_00_00 UTC).txt"]
+
+
+def test_initial_sync_skips_an_identical_copy_from_an_earlier_run(tmp_path, capsys):
+    docs = tmp_path / "target" / "Data" / "C" / "docs"
+    docs.mkdir(parents=True)
+    write_version(docs, "a (2021_03_01 10_00_00 UTC).txt", "old", 1614592800.1)
+    output = tmp_path / "restore"
+    os.makedirs(output / "C" / "docs")
+    write_version(output / "C" / "docs", "a.txt", "old", 1614592800.1)
+
+    with RecordSink(str(tmp_path / "deleted.jsonl")) as deleted_sink:
+        watch(str(tmp_path / "target"), str(output), deleted_sink=deleted_sink, polling=True, until=lambda: True)
+
+    assert "[COPY]" not in capsys.readouterr().out